@@ -0,0 +1,136 @@
+import mmap
+import os
+import struct
+
+try:
+    import fcntl
+except ImportError:  # Windows: без блокировок, порванные записи отсекает проверка ключа
+    fcntl = None
+
+from transposition import (TTEntry, EXACT, SCORE_OFFSET, DEPTH_SHIFT, BOUND_SHIFT, MOVE_SHIFT, AGE_SHIFT,
+                           AGE_MASK, ENTRY_BYTES, encode_move, decode_move)
+
+MAGIC = b'CBAC0001'
+HEADER = struct.Struct('<8sQQ')   # Сигнатура, число корзин, поколение
+HEADER_BYTES = 64
+BUCKET_SLOTS = 4
+LOCK_BASE = 1 << 40               # Байты для блокировок лежат за концом файла и не пересекаются с данными
+
+
+class AnalysisCache:
+    """Постоянный кэш результатов анализа в файле, отображенном в память.
+
+    Записи - как в таблице транспозиций (ключ Zobrist, сложенный по XOR с данными, и данные:
+    оценка за белых, глубина, тип оценки, лучший ход, поколение), поэтому читать можно без
+    блокировок. Запись в корзину защищена одной из stripes блокировок fcntl по байтовым
+    диапазонам, так что кэш можно делить между процессами и между запусками.
+    Размер файла фиксирован; при заполнении корзины вытесняется запись с наименьшей
+    глубиной с поправкой на возраст (каждое открытие кэша - новое поколение).
+    Оценки зависят от оценщика: разные конфигурации должны использовать разные файлы.
+    """
+
+    def __init__(self, path, size_mb=64, stripes=256):
+        self.path = path
+        self.stripes = stripes
+        buckets = max(1, int(size_mb * 1024 * 1024) // (BUCKET_SLOTS * ENTRY_BYTES))
+        buckets = 1 << (buckets.bit_length() - 1)
+        size = HEADER_BYTES + buckets * BUCKET_SLOTS * ENTRY_BYTES
+
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self.lock(-1)
+        try:
+            if os.fstat(self.fd).st_size == 0:
+                os.ftruncate(self.fd, size)
+                os.pwrite(self.fd, HEADER.pack(MAGIC, buckets, 0), 0)
+            magic, buckets, generation = HEADER.unpack(os.pread(self.fd, HEADER.size, 0))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an analysis cache")
+            generation += 1
+            os.pwrite(self.fd, HEADER.pack(MAGIC, buckets, generation), 0)
+        finally:
+            self.unlock(-1)
+
+        self.mmap = mmap.mmap(self.fd, HEADER_BYTES + buckets * BUCKET_SLOTS * ENTRY_BYTES)
+        self.slots = memoryview(self.mmap)[HEADER_BYTES:].cast('Q')
+        self.mask = buckets - 1
+        self.generation = generation & AGE_MASK
+        self.hits = 0
+        self.misses = 0
+
+    def lock(self, stripe):
+        if fcntl is not None:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, 1, LOCK_BASE + stripe + 1)
+
+    def unlock(self, stripe):
+        if fcntl is not None:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, LOCK_BASE + stripe + 1)
+
+    def probe(self, key):
+        """TTEntry для ключа или None; чтение без блокировки."""
+        slots = self.slots
+        index = (key & self.mask) * BUCKET_SLOTS * 2
+        for slot in range(index, index + BUCKET_SLOTS * 2, 2):
+            data = slots[slot + 1]
+            if data and slots[slot] ^ data == key:
+                self.hits += 1
+                return TTEntry((data >> DEPTH_SHIFT) & 0xFF,
+                               (data & 0xFFFFFFFF) - SCORE_OFFSET,
+                               (data >> BOUND_SHIFT) & 0x3,
+                               decode_move((data >> MOVE_SHIFT) & 0xFFFF))
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, score, bound, move=None):
+        """Сохраняет результат; более мелкий результат не заменяет уже сохраненный для той же позиции."""
+        slots = self.slots
+        bucket = key & self.mask
+        index = bucket * BUCKET_SLOTS * 2
+        data = ((int(score) + SCORE_OFFSET) & 0xFFFFFFFF) | (min(depth, 0xFF) << DEPTH_SHIFT) | \
+            (bound << BOUND_SHIFT) | (encode_move(move) << MOVE_SHIFT) | (self.generation << AGE_SHIFT)
+
+        stripe = bucket % self.stripes
+        self.lock(stripe)
+        try:
+            victim = None
+            victim_priority = None
+            for slot in range(index, index + BUCKET_SLOTS * 2, 2):
+                stored = slots[slot + 1]
+                if not stored:
+                    victim = slot
+                    break
+                if slots[slot] ^ stored == key:
+                    stored_depth = (stored >> DEPTH_SHIFT) & 0xFF
+                    if stored_depth > depth or (stored_depth == depth and bound != EXACT):
+                        return
+                    victim = slot
+                    break
+                # Приоритет сохранения: глубина минус возраст в поколениях
+                age = (self.generation - (stored >> AGE_SHIFT)) & AGE_MASK
+                priority = ((stored >> DEPTH_SHIFT) & 0xFF) - age
+                if victim is None or priority < victim_priority:
+                    victim, victim_priority = slot, priority
+            slots[victim] = key ^ data
+            slots[victim + 1] = data
+        finally:
+            self.unlock(stripe)
+
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def flush(self):
+        self.mmap.flush()
+
+    def close(self):
+        if self.mmap is not None:
+            self.slots.release()
+            self.mmap.flush()
+            self.mmap.close()
+            os.close(self.fd)
+            self.mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,185 @@
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+import chess
+import chess.pgn
+
+from chessbot import ChessBot
+
+
+def read_epd(path):
+    """Позиции EPD (или FEN) по одной: (идентификатор, FEN); идентификатор - операция id или номер строки."""
+    with open(path, encoding='utf-8') as epd:
+        for number, line in enumerate(epd, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                board, operations = chess.Board.from_epd(line)
+            except ValueError:
+                try:
+                    board, operations = chess.Board(line), {}  # Строка FEN вместо EPD
+                except ValueError:
+                    yield str(number), line  # Ошибку запишет исполнитель, номер позиции не пропадет
+                    continue
+            yield str(operations.get('id', number)), board.fen()
+
+
+def read_pgn(path):
+    """Все позиции основных вариантов партий PGN: ("партия:полуход", FEN)."""
+    with open(path, encoding='utf-8', errors='replace') as pgn:
+        number = 0
+        while True:
+            game = chess.pgn.read_game(pgn)
+            if game is None:
+                break
+            number += 1
+            board = game.board()
+            for ply, move in enumerate(game.mainline_moves()):
+                if not board.is_game_over():
+                    yield f"{number}:{ply}", board.fen()
+                board.push(move)
+
+
+def read_positions(path):
+    return read_pgn(path) if path.lower().endswith('.pgn') else read_epd(path)
+
+
+class Checkpoint:
+    """Прогресс анализа: все номера меньше next обработаны, done - обработанные после next.
+
+    Размер done ограничен числом заданий в работе, поэтому память не зависит от объема входа.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.next = 0
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as checkpoint:
+                state = json.load(checkpoint)
+            self.next = state['next']
+            self.done = set(state['done'])
+
+    def finished(self, index):
+        return index < self.next or index in self.done
+
+    def complete(self, index):
+        self.done.add(index)
+        while self.next in self.done:
+            self.done.remove(self.next)
+            self.next += 1
+
+    def save(self):
+        if not self.path:
+            return
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as checkpoint:
+            json.dump({'next': self.next, 'done': sorted(self.done)}, checkpoint)
+        os.replace(temporary, self.path)  # Атомарная замена: файл прогресса никогда не бывает порван
+
+
+def bounded(tasks, window, stopped):
+    """Выдает задания не быстрее, чем освобождаются места (обратное давление для пула).
+
+    Ожидание прерывается событием stopped, иначе поток раздачи заданий пула не завершится.
+    """
+    for task in tasks:
+        while not window.acquire(timeout=0.1):
+            if stopped.is_set():
+                return
+        if stopped.is_set():
+            return
+        yield task
+
+
+# Долгоживущий бот процесса-исполнителя
+_bot = None
+_limits = None
+
+
+def _init_worker(config, limits):
+    global _bot, _limits
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C обрабатывает главный процесс
+    _bot = ChessBot(**config)
+    _limits = limits
+
+
+def _analyse(task):
+    index, position_id, fen = task
+    max_time, max_nodes = _limits
+    try:
+        board = chess.Board(fen)
+    except ValueError as error:
+        return {'index': index, 'id': position_id, 'fen': fen, 'error': str(error)}
+    start = time.perf_counter()
+    move = _bot.find_best_move(board, max_time, max_nodes)
+    controller = _bot.controller
+    return {'index': index, 'id': position_id, 'fen': fen, 'bestmove': move.uci() if move else None,
+            'score': controller.score, 'depth': controller.completed_depth, 'nodes': controller.nodes,
+            'time': round(time.perf_counter() - start, 4)}
+
+
+def analyse_file(input_path, output_path, config, workers=None, max_time=None, max_nodes=None,
+                 ordered=False, checkpoint_path=None, window=None, report_every=100):
+    """Анализирует позиции из EPD/PGN и дописывает результаты в JSONL; возвращает число новых результатов.
+
+    Вход читается лениво, в пуле одновременно не больше window заданий. С checkpoint_path
+    повторный запуск продолжает с места остановки.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    window = threading.BoundedSemaphore(window or workers * 4)
+    stopped = threading.Event()
+    checkpoint = Checkpoint(checkpoint_path)
+    tasks = ((index, position_id, fen) for index, (position_id, fen) in enumerate(read_positions(input_path))
+             if not checkpoint.finished(index))
+
+    written = 0
+    start = time.monotonic()
+    pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(config, (max_time, max_nodes)))
+    try:
+        mapper = pool.imap if ordered else pool.imap_unordered
+        with open(output_path, 'a', encoding='utf-8') as output:
+            for result in mapper(_analyse, bounded(tasks, window, stopped)):
+                window.release()
+                output.write(json.dumps(result) + "\n")
+                checkpoint.complete(result['index'])
+                written += 1
+                if written % report_every == 0:
+                    output.flush()
+                    checkpoint.save()
+                    print(f"{written} positions, {written / (time.monotonic() - start):.1f}/s", flush=True)
+            output.flush()
+    finally:
+        stopped.set()
+        checkpoint.save()  # При прерывании сохраняем уже записанные результаты
+        pool.terminate()
+        pool.join()
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Пакетный анализ позиций из EPD/PGN в JSONL")
+    parser.add_argument("input", help="Файл EPD или PGN")
+    parser.add_argument("-o", "--output", default="analysis.jsonl")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--time", type=float, default=None, help="Секунд на позицию")
+    parser.add_argument("--nodes", type=int, default=None, help="Лимит узлов на позицию")
+    parser.add_argument("--evaluator", default='classic')
+    parser.add_argument("--hash", type=int, default=16, help="Таблица транспозиций каждого процесса, МБ")
+    parser.add_argument("--cache", default=None, help="Файл общего кэша анализа (analysis_cache.py)")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--ordered", action="store_true", help="Писать результаты в порядке входа")
+    parser.add_argument("--checkpoint", default=None, help="Файл прогресса (по умолчанию OUTPUT.checkpoint)")
+    args = parser.parse_args()
+
+    config = {'depth': args.depth, 'evaluator': args.evaluator, 'hash_size_mb': args.hash, 'cache': args.cache}
+    checkpoint_path = args.checkpoint or args.output + '.checkpoint'
+    count = analyse_file(args.input, args.output, config, max(1, args.workers), args.time, args.nodes,
+                         args.ordered, checkpoint_path)
+    print(f"Analysed {count} positions, results in {args.output}")
@@ -0,0 +1,156 @@
+import argparse
+import json
+import math
+import time
+
+import chess
+from chessbot import ChessBot
+from evaluate.lazy import LazyStats
+
+# Фиксированный набор позиций: по числу узлов на нем сравниваются версии движка
+BENCH_POSITIONS = [
+    # Дебют
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "r1bqkbnr/pppp1ppp/2n5/1B2p3/4P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3",
+    "rnbqkb1r/pp2pppp/3p1n2/8/3NP3/8/PPP2PPP/RNBQKB1R w KQkq - 1 5",
+    "rnbqkb1r/pppp1ppp/4pn2/8/2PP4/8/PP2PPPP/RNBQKBNR w KQkq - 0 3",
+    "rnbqk2r/ppp1ppbp/3p1np1/8/2PPP3/2N5/PP3PPP/R1BQKBNR w KQkq - 0 5",
+    "rnbqkbnr/pp2pppp/2p5/3p4/3PP3/8/PPP2PPP/RNBQKBNR w KQkq - 0 3",
+    "rnbqkbnr/ppp1pppp/8/3p4/2PP4/8/PP2PPPP/RNBQKBNR b KQkq - 0 2",
+    "r1bqk2r/pppp1ppp/2n2n2/2b1p3/2B1P3/2P2N2/PP1P1PPP/RNBQK2R w KQkq - 1 5",
+    "r1bqkb1r/pp3ppp/2nppn2/8/3NP3/2N5/PPP2PPP/R1BQKB1R w KQkq - 0 7",
+    "rnbqkb1r/1p2pppp/p2p1n2/8/3NP3/2N5/PPP2PPP/R1BQKB1R w KQkq - 0 6",
+    "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 8",
+    # Миттельшпиль
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r2q1rk1/pp2bppp/2n1bn2/2pp4/3P4/2PBPN2/PP1N1PPP/R1BQ1RK1 w - - 0 9",
+    "r1bq1rk1/ppp2ppp/2np1n2/2b1p3/2B1P3/2NP1N2/PPP2PPP/R1BQ1RK1 w - - 0 7",
+    "r2qr1k1/1b1nbppp/p2p1n2/1pp1p3/4P3/2PP1N1P/PPBN1PP1/R1BQR1K1 w - - 0 13",
+    "2rq1rk1/pb2bppp/1pn1pn2/2pp4/3P4/1P2PNP1/PBPN1PBP/R2Q1RK1 w - - 0 11",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+    "r1b2rk1/2q1b1pp/p2ppn2/1p6/3QP3/1BN1B3/PPP3PP/R4RK1 w - - 0 1",
+    "2r3k1/pp3ppp/2n1p3/3pPn2/3P4/P1r2N2/1P2BPPP/R4RK1 w - - 0 1",
+    "r3r1k1/2p2ppp/p1p1bn2/8/1q2P3/2NPQN2/PPP3PP/R4RK1 b - - 2 15",
+    "r1bbk1nr/pp3p1p/2n5/1N4p1/2Np1B2/8/PPP2PPP/2KR1B1R w kq - 0 13",
+    "r1bq1rk1/ppp1nppp/4n3/3p3Q/3P4/1BP1B3/PP1N2PP/R4RK1 w - - 1 16",
+    "4r1k1/r1q2ppp/ppp2n2/4P3/5Rb1/1N1BQ3/PPP3PP/R5K1 w - - 1 17",
+    "2rqkb1r/ppp2p2/2npb1p1/1N1Nn2p/2P1PP2/8/PP2B1PP/R1BQK2R b KQ - 0 11",
+    "r1bq1r1k/b1p1npp1/p2p3p/1p6/3PP3/1B2NN2/PP3PPP/R2Q1RK1 w - - 1 16",
+    "3r1rk1/p5pp/bpp1pp2/8/q1PP1P2/b3P3/P2NQRPP/1R2B1K1 b - - 6 22",
+    "r1q2rk1/2p1bppp/2Pp4/p6b/Q1PNp3/4B3/PP1R1PPP/2K4R w - - 2 18",
+    "4k2r/1pb2ppp/1p2p3/1R1p4/3P4/2r1PN2/P4PPP/1R4K1 b - - 3 22",
+    # Тактика
+    "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4",
+    "r1b1kb1r/pppp1ppp/5q2/4n3/3KP3/2N3PN/PPP4P/R1BQ1B1R b kq - 0 1",
+    "2kr3r/pp1q1ppp/5n2/1Nb5/2Pp1B2/7Q/P4PPP/1R3RK1 w - - 2 19",
+    "6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1",
+    "r1bqr1k1/pp1nbppp/2p2n2/3p2B1/3P4/2NBP3/PPQ1NPPP/R3K2R w KQ - 6 10",
+    "2r2rk1/1bqnbpp1/1p1ppn1p/pP6/N1P1P3/P2B1N1P/1B2QPP1/R2R2K1 b - - 0 1",
+    "r3kb1r/pp1n1ppp/1q2p3/n2p4/3P1Bb1/2PB1N2/PPQ2PPP/RN2K2R w KQkq - 3 11",
+    # Эндшпиль
+    "8/8/8/4k3/8/8/8/K6Q w - - 0 1",
+    "8/8/3k4/8/8/8/3K4/7R w - - 0 1",
+    "8/8/8/4k3/8/8/4P3/4K3 w - - 0 1",
+    "8/5pk1/6p1/8/8/6P1/5PK1/8 w - - 0 1",
+    "8/8/1p1k4/p1p5/P1P2K2/1P6/8/8 w - - 0 1",
+    "8/3k4/8/3P4/3K4/8/8/8 w - - 0 1",
+    "8/8/8/3b4/8/4k3/1P6/2K5 w - - 0 1",
+    "6k1/6p1/8/6KQ/1r6/q2b4/8/8 w - - 0 32",
+    "5rk1/1rP3pp/p4n2/3Pp3/1P2Pq2/2Q4P/P5P1/R3R1K1 b - - 0 32",
+    "8/8/2p5/1p1k4/1P6/P1K5/8/8 w - - 0 1",
+    "8/2k5/8/1P1K4/8/8/8/8 w - - 0 1",
+    "4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1",
+    "8/6pk/1p6/8/PP3p1p/5P2/4KP1q/3Q4 w - - 0 1",
+    "7k/3p2pp/4q3/8/4Q3/5Kp1/P6b/8 w - - 0 1",
+    "8/8/8/8/5kp1/P7/8/1K1N4 w - - 0 1",
+]
+
+
+def bench(depth=3, evaluator='classic', selective=False, hash_size_mb=16, positions=BENCH_POSITIONS, verbose=True):
+    """Поиск каждой позиции на фиксированную глубину новым ботом без ограничения времени.
+
+    Число узлов не зависит от скорости машины и служит подписью поведения поиска:
+    оно меняется только при изменении самого поиска или оценки.
+    """
+    results = []
+    total_nodes = 0
+    total_time = 0.0
+    depth_times = [0.0] * (depth + 1)
+    depth_nodes = [0] * (depth + 1)
+    lazy = None
+    for index, fen in enumerate(positions, 1):
+        bot = ChessBot(depth=depth, hash_size_mb=hash_size_mb, selective=selective, evaluator=evaluator)
+        board = chess.Board(fen)
+        start = time.perf_counter()
+        move = bot.find_best_move(board, max_time=None)
+        elapsed = time.perf_counter() - start
+        controller = bot.controller
+
+        previous_nodes = previous_time = 0
+        iterations = []
+        for iteration_depth, nodes, seconds in controller.iterations:
+            depth_nodes[iteration_depth] += nodes - previous_nodes
+            depth_times[iteration_depth] += seconds - previous_time
+            iterations.append({'depth': iteration_depth, 'nodes': nodes - previous_nodes,
+                               'time': seconds - previous_time})
+            previous_nodes, previous_time = nodes, seconds
+
+        if lazy is None:
+            lazy = LazyStats(bot.evaluator.stages)
+        lazy.evaluations += bot.evaluator.lazy_stats.evaluations
+        lazy.skips = [total + skips for total, skips in zip(lazy.skips, bot.evaluator.lazy_stats.skips)]
+
+        total_nodes += controller.nodes
+        total_time += elapsed
+        results.append({'fen': fen, 'move': move.uci() if move else None, 'score': controller.score,
+                        'nodes': controller.nodes, 'qnodes': controller.qnodes, 'time': elapsed,
+                        'iterations': iterations})
+        if verbose:
+            print(f"{index:2d}/{len(positions)} {move} nodes {controller.nodes:8d} time {elapsed:7.2f}s  {fen}")
+
+    # Эффективный коэффициент ветвления: рост числа узлов от итерации к итерации
+    branching = [depth_nodes[d] / depth_nodes[d - 1] for d in range(2, depth + 1) if depth_nodes[d - 1]]
+    summary = {
+        'depth': depth,
+        'evaluator': evaluator,
+        'selective': bool(selective),
+        'positions': len(positions),
+        'nodes': total_nodes,
+        'time': total_time,
+        'nps': int(total_nodes / total_time) if total_time else 0,
+        'depth_time': {d: depth_times[d] for d in range(1, depth + 1)},
+        'depth_nodes': {d: depth_nodes[d] for d in range(1, depth + 1)},
+        'ebf': math.exp(sum(map(math.log, branching)) / len(branching)) if branching else None,
+        'lazy_eval': lazy.to_dict() if lazy is not None else None,
+        'results': results,
+    }
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Детерминированный бенчмарк поиска")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--evaluator", default='classic')
+    parser.add_argument("--selective", action="store_true", help="Выборочный поиск (PVS, LMR, ...)")
+    parser.add_argument("--hash", type=int, default=16, help="Размер таблицы транспозиций, МБ")
+    parser.add_argument("--json", default=None, help="Файл для результатов в JSON")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    summary = bench(args.depth, args.evaluator, args.selective, args.hash, verbose=not args.quiet)
+    for d in range(1, args.depth + 1):
+        print(f"Depth {d}: {summary['depth_nodes'][d]:9d} nodes  {summary['depth_time'][d]:8.2f}s")
+    if summary['ebf'] is not None:
+        print(f"Effective branching factor: {summary['ebf']:.2f}")
+    lazy = summary['lazy_eval']
+    if lazy and lazy['evaluations']:
+        print(f"Lazy eval: {lazy['evaluations']} evaluations, {lazy['skip_rate']:.1%} cut short (" +
+              ", ".join(f"after {stage} {count}" for stage, count in lazy['skips'].items()) + ")")
+    print(f"Total time: {summary['time']:.2f}s")
+    print(f"Nodes/second: {summary['nps']}")
+    print(f"Nodes searched: {summary['nodes']}")  # Подпись поведения поиска
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as output:
+            json.dump(summary, output, indent=2)
@@ -0,0 +1,100 @@
+import argparse
+import random
+import time
+
+import chess
+from chessbot import ChessBot
+from eval_state import EvalState
+
+BENCH_POSITION = "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4"
+
+
+def random_walks(count, max_plies, seed):
+    """Случайные партии: возвращает пары (доска, ход) для проверки make/unmake."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        board = chess.Board()
+        for _ in range(rng.randint(1, max_plies)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            move = rng.choice(moves)
+            yield board, move
+            board.push(move)
+
+
+def check_consistency(bot, count, max_plies, seed):
+    """Сверяет инкрементальную оценку с оценкой с нуля после каждого хода и отмены."""
+    checked = 0
+    for board, move in random_walks(count, max_plies, seed):
+        state = EvalState(board)
+        state.push(board, move)
+        board.push(move)
+        if bot.evaluate_board(board, state) != bot.evaluate_board(board):
+            raise AssertionError(f"Incremental eval mismatch after {move} in {board.fen()}")
+        board.pop()
+        state.pop()
+        fresh = EvalState(board)
+        if (state.material, state.psqt) != (fresh.material, fresh.psqt):
+            raise AssertionError(f"Accumulators not restored after {move} in {board.fen()}")
+        checked += 1
+    return checked
+
+
+def check_aborts(max_nodes, depth=3, selective=False):
+    """Прерывает поиск лимитом узлов в каждой точке до max_nodes и проверяет, что доска
+    и аккумуляторы оценки вернулись в корень."""
+    board = chess.Board(BENCH_POSITION)
+    for nodes in range(1, max_nodes + 1):
+        bot = ChessBot(depth=depth, selective=selective)
+        move = bot.find_best_move(board, max_time=None, max_nodes=nodes)
+        if move is None or board.fen() != BENCH_POSITION or bot.eval_state.stack:
+            raise AssertionError(f"Search not unwound after abort at {nodes} nodes")
+        if bot.game_state is not None and bot.game_state.stack:
+            raise AssertionError(f"Game state not unwound after abort at {nodes} nodes")
+    return max_nodes
+
+
+def benchmark(bot, positions, repeat):
+    """Сравнивает стоимость листовой оценки с нуля и с аккумуляторами."""
+    states = [EvalState(board) for board in positions]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for board in positions:
+            bot.evaluate_board(board)
+    scratch = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for board, state in zip(positions, states):
+            bot.evaluate_board(board, state)
+    incremental = time.perf_counter() - start
+    return scratch, incremental
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Проверка и бенчмарк инкрементальной оценки")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--plies", type=int, default=80)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--aborts", type=int, default=300, help="Лимиты узлов для проверки прерывания")
+    args = parser.parse_args()
+
+    bot = ChessBot()
+    checked = check_consistency(bot, args.games, args.plies, args.seed)
+    print(f"Checked {checked} moves: incremental eval matches from-scratch eval")
+    for selective in (False, True):
+        aborts = check_aborts(args.aborts, selective=selective)
+    print(f"Checked {aborts} node limits per search mode: aborted search unwinds to the root")
+
+    positions = []
+    for board, _ in random_walks(args.games // 4 or 1, args.plies, args.seed + 1):
+        positions.append(board.copy(stack=False))
+    scratch, incremental = benchmark(bot, positions, args.repeat)
+    evals = len(positions) * args.repeat
+    print(f"From scratch: {scratch * 1e6 / evals:.1f} us/eval")
+    print(f"Incremental:  {incremental * 1e6 / evals:.1f} us/eval")
+    print(f"Speedup:      {scratch / incremental:.2f}x")
+    print(f"Pawn hash hit rate: {bot.pawn_hash.hit_rate():.1%}")
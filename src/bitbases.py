@@ -0,0 +1,359 @@
+import argparse
+import mmap
+import os
+import struct
+import time
+from collections import deque
+
+import chess
+
+from evaluate.attack_maps import piece_attacks
+
+# Таблицы: фигуры сильной стороны кроме короля (у слабой стороны только король)
+TABLES = {
+    'KQK': (chess.QUEEN,),
+    'KRK': (chess.ROOK,),
+    'KPK': (chess.PAWN,),
+    'KBNK': (chess.BISHOP, chess.KNIGHT),
+}
+# KPK ссылается на KQK и KRK через превращения, поэтому они строятся раньше
+GENERATION_ORDER = ['KQK', 'KRK', 'KPK', 'KBNK']
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bitbases')
+MAGIC = b'CBBB0001'
+HEADER = struct.Struct('<8s8sQ')
+
+# Результат пробы относительно стороны, которая ходит
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+
+def _transform(square, transform):
+    file, rank = chess.square_file(square), chess.square_rank(square)
+    if transform & 1:
+        file = 7 - file
+    if transform & 2:
+        rank = 7 - rank
+    if transform & 4:
+        file, rank = rank, file
+    return chess.square(file, rank)
+
+
+# Восемь симметрий доски; для таблиц с пешками допустимо только отражение по вертикали
+TRANSFORMS = [[_transform(square, transform) for square in chess.SQUARES] for transform in range(8)]
+
+
+class TableSpec:
+    """Схема индексации таблицы: сторона хода, белый король (с учетом симметрии), черный король, фигуры."""
+
+    def __init__(self, name):
+        self.name = name
+        self.pieces = TABLES[name]
+        self.has_pawns = chess.PAWN in self.pieces
+        if self.has_pawns:
+            transforms = (0, 1)
+            region = [square for square in chess.SQUARES if chess.square_file(square) <= 3]
+        else:
+            transforms = range(8)
+            region = [square for square in chess.SQUARES
+                      if chess.square_rank(square) <= chess.square_file(square) <= 3]
+        self.king_squares = region
+        self.king_index = [-1] * 64
+        for index, square in enumerate(region):
+            self.king_index[square] = index
+        # Для каждого поля белого короля - симметрии, переводящие его в канонический регион
+        self.king_transforms = [[t for t in transforms if self.king_index[TRANSFORMS[t][square]] >= 0]
+                                for square in chess.SQUARES]
+        self.size = 2 * len(region) * 64 ** (1 + len(self.pieces))
+
+    def index(self, turn, white_king, black_king, pieces):
+        """Канонический индекс: минимальный по всем симметриям, переводящим белого короля в регион."""
+        best = None
+        for transform in self.king_transforms[white_king]:
+            table = TRANSFORMS[transform]
+            index = ((0 if turn == chess.WHITE else 1) * len(self.king_squares) +
+                     self.king_index[table[white_king]]) * 64 + table[black_king]
+            for square in pieces:
+                index = index * 64 + table[square]
+            if best is None or index < best:
+                best = index
+        return best
+
+    def decode(self, index):
+        pieces = []
+        for _ in self.pieces:
+            index, square = divmod(index, 64)
+            pieces.append(square)
+        pieces.reverse()
+        index, black_king = divmod(index, 64)
+        turn_index, king = divmod(index, len(self.king_squares))
+        return turn_index == 0, self.king_squares[king], black_king, tuple(pieces)
+
+
+def _occupancy(white_king, black_king, pieces):
+    occupied = chess.BB_SQUARES[white_king] | chess.BB_SQUARES[black_king]
+    for square in pieces:
+        occupied |= chess.BB_SQUARES[square]
+    return occupied
+
+
+def _white_attacks(spec, white_king, pieces, occupied, skip=None):
+    """Поля, атакованные белыми (фигура с индексом skip не учитывается)."""
+    attacks = chess.BB_KING_ATTACKS[white_king]
+    for index, (piece_type, square) in enumerate(zip(spec.pieces, pieces)):
+        if index != skip:
+            attacks |= piece_attacks(piece_type, chess.WHITE, square, occupied)
+    return attacks
+
+
+def _is_legal(spec, turn, white_king, black_king, pieces):
+    squares = {white_king, black_king, *pieces}
+    if len(squares) != 2 + len(pieces):
+        return False
+    if chess.BB_KING_ATTACKS[white_king] & chess.BB_SQUARES[black_king]:
+        return False
+    for piece_type, square in zip(spec.pieces, pieces):
+        if piece_type == chess.PAWN and chess.square_rank(square) in (0, 7):
+            return False
+    if turn == chess.WHITE:
+        occupied = _occupancy(white_king, black_king, pieces)
+        if _white_attacks(spec, white_king, pieces, occupied) & chess.BB_SQUARES[black_king]:
+            return False
+    return True
+
+
+class BitbaseGenerator:
+    """Ретроградный анализ: от матов назад по ходам до неподвижной точки."""
+
+    def __init__(self, name, lookup=None):
+        self.spec = TableSpec(name)
+        self.lookup = lookup  # Для превращений: (таблица, белый король, черный король, фигура) -> выигрыш ли
+        self.won = bytearray(self.spec.size)  # 1: ходят белые и выигрывают / ходят черные и проигрывают
+
+    def black_is_lost(self, white_king, black_king, pieces):
+        """Черные (ход черных) проигрывают: мат или все ходы ведут в выигранные для белых позиции."""
+        spec = self.spec
+        occupied = _occupancy(white_king, black_king, pieces)
+        # Атаки считаются "сквозь" черного короля: отступить вдоль линии атаки нельзя
+        xray = _white_attacks(spec, white_king, pieces, occupied & ~chess.BB_SQUARES[black_king])
+        in_check = bool(xray & chess.BB_SQUARES[black_king])
+
+        has_move = False
+        targets = chess.BB_KING_ATTACKS[black_king] & ~chess.BB_KING_ATTACKS[white_king] & \
+            ~chess.BB_SQUARES[white_king]
+        for target in chess.scan_reversed(targets):
+            if target in pieces:
+                captured = pieces.index(target)
+                defended = _white_attacks(spec, white_king, pieces,
+                                          occupied & ~chess.BB_SQUARES[black_king], skip=captured)
+                if not defended & chess.BB_SQUARES[target]:
+                    return False  # Взятие незащищенной фигуры ведет к ничьей
+                continue
+            if xray & chess.BB_SQUARES[target]:
+                continue
+            has_move = True
+            if not self.won[spec.index(chess.WHITE, white_king, target, pieces)]:
+                return False
+        return has_move or in_check
+
+    def promotion_wins(self, white_king, black_king, pieces):
+        """Белые (ход белых) выигрывают превращением пешки (по таблицам KQK/KRK)."""
+        square = pieces[0]
+        if chess.square_rank(square) != 6:
+            return False
+        target = square + 8
+        if target in (white_king, black_king):
+            return False
+        return self.lookup('KQK', white_king, black_king, target) or \
+            self.lookup('KRK', white_king, black_king, target)
+
+    def white_predecessors(self, white_king, black_king, pieces):
+        """Позиции с ходом белых, из которых одним ходом белых получается данная."""
+        spec = self.spec
+        occupied = _occupancy(white_king, black_king, pieces)
+        empty = ~occupied & chess.BB_ALL
+
+        for origin in chess.scan_reversed(chess.BB_KING_ATTACKS[white_king] & empty &
+                                          ~chess.BB_KING_ATTACKS[black_king]):
+            yield origin, pieces
+
+        for index, (piece_type, square) in enumerate(zip(spec.pieces, pieces)):
+            if piece_type == chess.PAWN:
+                rank = chess.square_rank(square)
+                origins = []
+                if rank >= 2 and empty & chess.BB_SQUARES[square - 8]:
+                    origins.append(square - 8)
+                    if rank == 3 and empty & chess.BB_SQUARES[square - 16]:
+                        origins.append(square - 16)
+            else:
+                origins = chess.scan_reversed(piece_attacks(piece_type, chess.WHITE, square, occupied) & empty)
+            for origin in origins:
+                yield white_king, pieces[:index] + (origin,) + pieces[index + 1:]
+
+    def generate(self):
+        spec = self.spec
+        won = self.won
+        queue = deque()
+
+        for index in range(spec.size):
+            turn, white_king, black_king, pieces = spec.decode(index)
+            if not _is_legal(spec, turn, white_king, black_king, pieces):
+                continue
+            if turn == chess.BLACK:
+                if self.black_is_lost(white_king, black_king, pieces):
+                    won[index] = 1
+                    queue.append(index)
+            elif spec.has_pawns and self.promotion_wins(white_king, black_king, pieces):
+                won[index] = 1
+                queue.append(index)
+
+        while queue:
+            turn, white_king, black_king, pieces = spec.decode(queue.popleft())
+            if turn == chess.BLACK:
+                # Черные проиграны: выигрывает любая позиция, где белые могут сюда пойти
+                for origin_king, origin_pieces in self.white_predecessors(white_king, black_king, pieces):
+                    index = spec.index(chess.WHITE, origin_king, black_king, origin_pieces)
+                    if not won[index] and _is_legal(spec, chess.WHITE, origin_king, black_king, origin_pieces):
+                        won[index] = 1
+                        queue.append(index)
+            else:
+                # Белые выигрывают: проверяем позиции, откуда черные могли прийти сюда королем
+                occupied = _occupancy(white_king, black_king, pieces)
+                origins = chess.BB_KING_ATTACKS[black_king] & ~occupied & ~chess.BB_KING_ATTACKS[white_king]
+                for origin in chess.scan_reversed(origins):
+                    index = spec.index(chess.BLACK, white_king, origin, pieces)
+                    if not won[index] and self.black_is_lost(white_king, origin, pieces):
+                        won[index] = 1
+                        queue.append(index)
+        return won
+
+    def save(self, path):
+        """Записывает таблицу по биту на позицию."""
+        packed = bytearray((self.spec.size + 7) // 8)
+        for index in range(self.spec.size):
+            if self.won[index]:
+                packed[index >> 3] |= 1 << (index & 7)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as table:
+            table.write(HEADER.pack(MAGIC, self.spec.name.encode(), self.spec.size))
+            table.write(packed)
+        os.replace(tmp_path, path)
+
+
+class Bitbase:
+    """Битовая таблица, отображенная в память."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as table:
+            self.data = mmap.mmap(table.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, name, size = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a bitbase file")
+        self.spec = TableSpec(name.rstrip(b'\0').decode())
+        if size != self.spec.size:
+            raise ValueError(f"{path} has unexpected size")
+
+    def won(self, turn, white_king, black_king, pieces):
+        index = self.spec.index(turn, white_king, black_king, pieces)
+        return bool(self.data[HEADER.size + (index >> 3)] >> (index & 7) & 1)
+
+    def close(self):
+        self.data.close()
+
+
+class EndgameBitbases:
+    """Набор битовых таблиц эндшпиля из каталога; отсутствующие таблицы просто не используются."""
+
+    def __init__(self, directory=DEFAULT_DIRECTORY):
+        self.directory = directory
+        self.tables = {}
+        for name in TABLES:
+            path = table_path(directory, name)
+            if os.path.exists(path):
+                self.tables[name] = Bitbase(path)
+        # Сигнатура материала (отсортированные типы фигур) -> имя таблицы
+        self.signatures = {tuple(sorted(TABLES[name])): name for name in self.tables}
+
+    def probe(self, board):
+        """WIN/DRAW/LOSS для стороны, которая ходит, или None, если позиция не покрыта таблицами."""
+        if not self.tables or chess.popcount(board.occupied) > 4:
+            return None
+        white = board.occupied_co[chess.WHITE] & ~board.kings
+        black = board.occupied_co[chess.BLACK] & ~board.kings
+        if white and black:
+            return None
+        strong = chess.WHITE if white else chess.BLACK
+
+        squares = sorted(chess.scan_reversed(white | black), key=lambda square: board.piece_type_at(square))
+        name = self.signatures.get(tuple(board.piece_type_at(square) for square in squares))
+        if name is None:
+            return None
+        table = self.tables[name]
+        order = sorted(range(len(squares)), key=lambda i: table.spec.pieces.index(board.piece_type_at(squares[i])))
+        pieces = [squares[i] for i in order]
+
+        white_king = board.king(strong)
+        black_king = board.king(not strong)
+        turn = board.turn == strong
+        if strong == chess.BLACK:
+            # Приводим к сильной стороне за белых отражением по горизонтали
+            white_king ^= 56
+            black_king ^= 56
+            pieces = [square ^ 56 for square in pieces]
+
+        won = table.won(chess.WHITE if turn else chess.BLACK, white_king, black_king, tuple(pieces))
+        if not won:
+            return DRAW
+        return WIN if turn else LOSS
+
+    def close(self):
+        for table in self.tables.values():
+            table.close()
+
+
+def table_path(directory, name):
+    return os.path.join(directory, name + '.bb')
+
+
+def generate_tables(names, directory=DEFAULT_DIRECTORY, force=False, verbose=True):
+    """Строит недостающие таблицы (или все при force) и сохраняет их в каталог."""
+    os.makedirs(directory, exist_ok=True)
+    loaded = {}
+
+    def lookup(name, white_king, black_king, square):
+        # Позиция после превращения: ходят черные
+        if name not in loaded:
+            loaded[name] = Bitbase(table_path(directory, name))
+        return loaded[name].won(chess.BLACK, white_king, black_king, (square,))
+
+    for name in GENERATION_ORDER:
+        if name not in names:
+            continue
+        path = table_path(directory, name)
+        if os.path.exists(path) and not force:
+            if verbose:
+                print(f"{name}: cached in {path}")
+            continue
+        if name == 'KPK':
+            for dependency in ('KQK', 'KRK'):
+                if not os.path.exists(table_path(directory, dependency)):
+                    generate_tables([dependency], directory, force=False, verbose=verbose)
+        start = time.time()
+        generator = BitbaseGenerator(name, lookup)
+        generator.generate()
+        generator.save(path)
+        if verbose:
+            wins = sum(generator.won)
+            print(f"{name}: {generator.spec.size} positions, {wins} won, {time.time() - start:.1f}s -> {path}")
+    for table in loaded.values():
+        table.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Генерация битовых таблиц эндшпиля ретроградным анализом")
+    parser.add_argument("tables", nargs="*", default=GENERATION_ORDER, help="Таблицы: " + ", ".join(GENERATION_ORDER))
+    parser.add_argument("--dir", default=DEFAULT_DIRECTORY, help="Каталог для таблиц")
+    parser.add_argument("--force", action="store_true", help="Перестроить уже существующие таблицы")
+    args = parser.parse_args()
+    generate_tables([name.upper() for name in args.tables], args.dir, args.force)
@@ -0,0 +1,54 @@
+import random
+
+import chess
+import chess.polyglot
+
+
+class OpeningBook:
+    """Дебютная книга Polyglot (.bin).
+
+    Файл отображается в память (mmap) и ищется бинарным поиском по отсортированным
+    ключам Zobrist, поэтому ход из книги находится без загрузки файла целиком.
+    """
+
+    def __init__(self, path, selection='weighted', max_ply=20, minimum_weight=1, seed=None):
+        if selection not in ('weighted', 'best'):
+            raise ValueError(f"Unknown book selection mode: {selection}")
+        self.path = path
+        self.selection = selection
+        self.max_ply = max_ply
+        self.minimum_weight = minimum_weight
+        self.random = random.Random(seed)
+        self.reader = chess.polyglot.open_reader(path)
+
+    def entries(self, board):
+        """Все ходы книги для позиции (move, weight), отсортированные по убыванию веса."""
+        entries = [(entry.move, entry.weight)
+                   for entry in self.reader.find_all(board, minimum_weight=self.minimum_weight)]
+        return sorted(entries, key=lambda entry: entry[1], reverse=True)
+
+    def choose(self, board):
+        """Ход из книги или None, если позиции нет в книге или дебют уже закончился."""
+        if self.max_ply is not None and board.ply() >= self.max_ply:
+            return None
+        entries = self.entries(board)
+        if not entries:
+            return None
+        if self.selection == 'best':
+            return entries[0][0]
+        total = sum(weight for _, weight in entries)
+        pick = self.random.randint(0, total - 1)
+        for move, weight in entries:
+            pick -= weight
+            if pick < 0:
+                return move
+        return entries[0][0]
+
+    def close(self):
+        self.reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
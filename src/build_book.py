@@ -0,0 +1,78 @@
+import argparse
+import struct
+from collections import defaultdict
+
+import chess
+import chess.pgn
+import chess.polyglot
+
+# Вес хода по результату партии для сделавшей его стороны
+RESULT_WEIGHTS = {'win': 2, 'draw': 1, 'loss': 0}
+PROMOTION_CODES = {None: 0, chess.KNIGHT: 1, chess.BISHOP: 2, chess.ROOK: 3, chess.QUEEN: 4}
+
+
+def encode_polyglot_move(board, move):
+    """Кодирует ход в формате Polyglot (рокировка - ход короля на поле ладьи)."""
+    to_square = move.to_square
+    if board.is_castling(move) and not board.chess960:
+        rank = chess.square_rank(move.from_square)
+        to_square = chess.square(7 if to_square > move.from_square else 0, rank)
+    return (chess.square_file(to_square) | (chess.square_rank(to_square) << 3) |
+            (chess.square_file(move.from_square) << 6) | (chess.square_rank(move.from_square) << 9) |
+            (PROMOTION_CODES[move.promotion] << 12))
+
+
+def collect(pgn_paths, max_ply):
+    """Суммирует веса ходов по ключам позиций из PGN-файлов."""
+    weights = defaultdict(int)
+    games = 0
+    for path in pgn_paths:
+        with open(path, encoding='utf-8', errors='replace') as pgn:
+            while True:
+                game = chess.pgn.read_game(pgn)
+                if game is None:
+                    break
+                result = game.headers.get('Result', '*')
+                if result not in ('1-0', '0-1', '1/2-1/2'):
+                    continue
+                games += 1
+                board = game.board()
+                for ply, move in enumerate(game.mainline_moves()):
+                    if ply >= max_ply:
+                        break
+                    if result == '1/2-1/2':
+                        outcome = 'draw'
+                    elif (result == '1-0') == (board.turn == chess.WHITE):
+                        outcome = 'win'
+                    else:
+                        outcome = 'loss'
+                    weight = RESULT_WEIGHTS[outcome]
+                    key = chess.polyglot.zobrist_hash(board)
+                    weights[key, encode_polyglot_move(board, move)] += weight
+                    board.push(move)
+    return weights, games
+
+
+def write_book(weights, path, min_weight=1):
+    """Записывает книгу: записи по 16 байт, отсортированы по ключу и убыванию веса."""
+    entries = [(key, move, weight) for (key, move), weight in weights.items() if weight >= min_weight]
+    scale = max((weight for _, _, weight in entries), default=0)
+    scale = max(1, -(-scale // 0xFFFF))  # Веса Polyglot - 16-битные
+    entries.sort(key=lambda entry: (entry[0], -entry[2]))
+    with open(path, 'wb') as book:
+        for key, move, weight in entries:
+            book.write(struct.pack('>QHHI', key, move, max(1, weight // scale), 0))
+    return len(entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Построение книги Polyglot из PGN-файлов")
+    parser.add_argument("pgn", nargs="+", help="PGN-файлы с партиями")
+    parser.add_argument("-o", "--output", default="book.bin")
+    parser.add_argument("--max-ply", type=int, default=20, help="Сколько полуходов каждой партии брать в книгу")
+    parser.add_argument("--min-weight", type=int, default=2, help="Минимальный суммарный вес хода")
+    args = parser.parse_args()
+
+    weights, games = collect(args.pgn, args.max_ply)
+    count = write_book(weights, args.output, args.min_weight)
+    print(f"{games} games, {count} entries written to {args.output}")
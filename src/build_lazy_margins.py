@@ -0,0 +1,72 @@
+import argparse
+import json
+import math
+
+import chess
+
+from analyze import read_positions
+from bench_eval import random_walks
+from eval_state import EvalState
+from evaluate import get_evaluator
+from evaluate.game_state import GameState
+from evaluate.lazy import MARGINS_PATH, read_margins
+from evaluate.weights import WEIGHTS, weights_hash
+
+# Максимум по выборке - не граница вклада стадий: на других позициях он бывает больше
+SAFETY_FACTOR = 1.25
+
+
+def sample_positions(input_paths=(), games=500, max_plies=120, seed=1):
+    """Позиции из EPD/PGN и из случайных партий (в них встречаются любые перекосы признаков)."""
+    for input_path in input_paths:
+        for _, fen in read_positions(input_path):
+            yield chess.Board(fen)
+    for board, _ in random_walks(games, max_plies, seed):
+        if not board.is_game_over():
+            yield board.copy()
+
+
+def stage_margins(evaluator, boards, quantile=1.0, safety=SAFETY_FACTOR):
+    """Запасы стадий: квантиль вклада всех стадий после данной (1.0 - максимум по выборке),
+    умноженный на safety."""
+    remaining = [[] for _ in evaluator.stages[:-1]]
+    for board in boards:
+        game_state = GameState(board) if evaluator.needs_game_state else None
+        scores = list(evaluator.stage_scores(board, EvalState(board), game_state))
+        for stage, score in enumerate(scores[:-1]):
+            remaining[stage].append(abs(scores[-1] - score))
+    margins = []
+    for values in remaining:
+        values.sort()
+        margins.append(math.ceil(values[min(len(values) - 1, int(quantile * len(values)))] * safety)
+                       if values else 0)
+    return margins, len(remaining[0]) if remaining else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Расчет запасов ленивой оценки по выборке позиций")
+    parser.add_argument("--input", action="append", default=[], help="EPD/PGN с позициями (можно несколько)")
+    parser.add_argument("--games", type=int, default=500, help="Число случайных партий в выборке")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--evaluators", default="classic,full", help="Оценщики через запятую")
+    parser.add_argument("--quantile", type=float, default=1.0,
+                        help="Квантиль вклада стадий: меньше 1.0 - чаще досрочный выход ценой редких ошибок")
+    parser.add_argument("--safety", type=float, default=SAFETY_FACTOR, help="Множитель запаса сверх выборки")
+    parser.add_argument("-o", "--output", default=MARGINS_PATH)
+    args = parser.parse_args()
+
+    margins = read_margins(args.output)  # Запасы других оценщиков сохраняются, если веса те же
+    for name in args.evaluators.split(','):
+        evaluator = get_evaluator(name)
+        if len(evaluator.stages) < 2:
+            print(f"{name}: single stage, skipped")
+            continue
+        values, count = stage_margins(evaluator, sample_positions(args.input, args.games, seed=args.seed),
+                                      args.quantile, args.safety)
+        margins[name] = values
+        print(f"{name}: {count} positions, margins " +
+              ", ".join(f"after {stage} {margin}" for stage, margin in zip(evaluator.stages, values)))
+    margins['weights'] = weights_hash(WEIGHTS)
+    with open(args.output, 'w', encoding='utf-8') as margins_file:
+        json.dump(margins, margins_file, indent=2)
+        margins_file.write("\n")
@@ -1,7 +1,7 @@
 import math
 import time
 from tabulate import tabulate
-from ai.evaluate.evaluator import evaluate_board
+from evaluate.evaluator import evaluate_board
 
 class ChessBot:
     def __init__(self, depth=3):
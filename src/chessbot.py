@@ -1,50 +1,88 @@
 import chess
 import math
-import time
+
+from transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from zobrist import zobrist_hash, push_with_key
+from eval_state import EvalState, PIECE_VALUES
+from evaluate.attack_maps import AttackMaps
+from evaluate.pawn_hash import PawnHashTable
+from evaluate.game_state import GameState
+from evaluate import get_evaluator
+from search_control import SearchController, SearchAborted
+from search_stats import SearchStats
+from see import mvv_lva, static_exchange_evaluation
+from move_ordering import MoveOrdering
+from book import OpeningBook
+from bitbases import EndgameBitbases, WIN, DRAW
+from analysis_cache import AnalysisCache
+
+INFINITE_SCORE = 1000000
+KNOWN_WIN_SCORE = 5000  # Выигрыш по битовым таблицам: больше любой оценки, но меньше мата
+REPETITION_PENALTY = 50  # Штраф стороне, которая ищет ход, за повторение позиции партии
+
+# Приемы выборочного поиска; каждый можно выключить отдельно для замеров
+SELECTIVE_OPTIONS = {
+    'pvs': True,         # Поиск с нулевым окном для всех ходов, кроме первого
+    'aspiration': True,  # Окно вокруг оценки предыдущей итерации
+    'null_move': True,   # Отсечение нулевым ходом
+    'lmr': True,         # Сокращение глубины для поздних тихих ходов
+    'futility': True,    # Отбрасывание тихих ходов у горизонта
+}
+ASPIRATION_WINDOW = 50
+FUTILITY_MARGINS = (0, 200, 500)  # По оставшейся глубине
+NULL_MOVE_MIN_DEPTH = 3
+LMR_MIN_DEPTH = 3
+LMR_MIN_INDEX = 3
 
 class ChessBot:
-    def __init__(self, depth=3):
+    def __init__(self, depth=3, hash_size_mb=16, selective=False, book=None, bitbases=None,
+                 evaluator='classic', stats=False, on_iteration=None, stats_log=None, cache=None):
+        """selective: False - полный alpha-beta minimax, True - выборочный поиск со всеми приемами,
+        dict - выборочный поиск с переопределением отдельных переключателей SELECTIVE_OPTIONS.
+        book: OpeningBook или путь к книге Polyglot, которая проверяется до поиска.
+        bitbases: EndgameBitbases или каталог с битовыми таблицами эндшпиля.
+        evaluator: имя оценщика из реестра evaluate ('fast', 'classic', 'full') или объект Evaluator.
+        stats: собирать SearchStats (таблица транспозиций, отсечения, итерации с главным вариантом);
+        on_iteration(stats, iteration) вызывается после каждой итерации, stats_log - файл, куда
+        дописывается JSON-строка со статистикой каждого поиска. Без stats счетчики не обновляются.
+        cache: AnalysisCache или путь к файлу постоянного кэша анализа, общего для процессов и запусков."""
         self.depth = depth
+        self.book = OpeningBook(book) if isinstance(book, str) else book
+        self.bitbases = EndgameBitbases(bitbases) if isinstance(bitbases, str) else bitbases
+        self.cache = AnalysisCache(cache) if isinstance(cache, str) else cache
+        if isinstance(selective, dict):
+            self.selective = dict(SELECTIVE_OPTIONS, **selective)
+        elif selective:
+            self.selective = dict(SELECTIVE_OPTIONS)
+        else:
+            self.selective = None
         self.position_history = set()  # Храним хэши позиций
-        self.transposition_table = {}  # Таблица транспозиции
-        self.killer_moves = {}         # Сохраняем хорошие ходы для каждой глубины
+        self.transposition_table = TranspositionTable(hash_size_mb)  # Таблица транспозиции
+        self.move_ordering = MoveOrdering()  # "Убийственные" ходы, история и ответные ходы
+        self.evaluator = get_evaluator(evaluator)  # Оценка позиции без учета мата и битовых таблиц
+        self.eval_state = EvalState()  # Инкрементальные аккумуляторы оценки для поиска
+        self.game_state = GameState() if self.evaluator.needs_game_state else None  # Учет партии для оценки дебюта
+        self.pawn_hash = getattr(self.evaluator, 'pawn_hash', None) or PawnHashTable()  # Кэш пешечной структуры
+        self.controller = SearchController()  # Лимиты текущего поиска (время, узлы, остановка)
+        self.root_depth = None
+        self.root_ply = 0
+        self.root_color = chess.WHITE  # Сторона хода в корне: ей начисляется штраф за повторение
+        self.stop_event = None  # Общий сигнал остановки для параллельного поиска
+        self.stats = SearchStats() if stats or on_iteration or stats_log else None
+        self.on_iteration = on_iteration
+        self.stats_log = stats_log
 
     def calculate_pawn_islands(self, board, color):
         """Возвращает количество пешечных островов для указанного цвета."""
-        files_with_pawns = set(chess.square_file(square) for square in board.pieces(chess.PAWN, color))
-        islands = 0
-        last_file = -2
-        for file in sorted(files_with_pawns):
-            if file > last_file + 1:
-                islands += 1
-            last_file = file
-        return islands
+        return self.pawn_hash.probe(board).islands[color]
 
     def calculate_isolated_pawns(self, board, color):
         """Возвращает количество изолированных пешек."""
-        isolated_pawns = 0
-        for square in board.pieces(chess.PAWN, color):
-            file = chess.square_file(square)
-            left_adjacent_file = file - 1 if file > 0 else None
-            right_adjacent_file = file + 1 if file < 7 else None
-
-            # Проверяем пешки на соседних вертикалях (файлах)
-            has_left_pawn = any(board.piece_at(chess.square(left_adjacent_file, rank)) == chess.PAWN for rank in range(8)) if left_adjacent_file is not None else False
-            has_right_pawn = any(board.piece_at(chess.square(right_adjacent_file, rank)) == chess.PAWN for rank in range(8)) if right_adjacent_file is not None else False
-
-            if not has_left_pawn and not has_right_pawn:
-                isolated_pawns += 1
-
-        return isolated_pawns
+        return self.pawn_hash.probe(board).isolated[color]
 
     def calculate_doubled_pawns(self, board, color):
         """Возвращает количество удвоенных пешек."""
-        doubled_pawns = 0
-        for file in chess.FILE_NAMES:
-            pawns_in_file = board.pieces(chess.PAWN, color) & chess.BB_FILES[chess.FILE_NAMES.index(file)]
-            if len(pawns_in_file) > 1:
-                doubled_pawns += 1
-        return doubled_pawns
+        return self.pawn_hash.probe(board).doubled[color]
 
     def control_of_open_lines(self, board, piece_type, color):
         """Возвращает оценку контроля открытых линий (для ладей)."""
@@ -56,151 +94,570 @@ class ChessBot:
                     open_lines += 1
         return open_lines
 
-    def spatial_advantage(self, board, color):
+    def spatial_advantage(self, board, color, attack_maps=None):
         """Оценка пространственного преимущества (число полей, контролируемых фигурами указанного цвета)."""
-        control = 0
-        for square in chess.SQUARES:
-            attackers = board.attackers(color, square)
-            if len(attackers) > 0:
-                control += 1
-        return control
-
-    def evaluate_board(self, board):
+        if attack_maps is None:
+            attack_maps = AttackMaps(board)
+        return attack_maps.space(color)
+
+    def evaluate_board(self, board, state=None, alpha=None, beta=None):
+        """Оценка позиции; если передано состояние поиска, оценщик берет материал и центр из его аккумуляторов.
+        С окном [alpha, beta] (за белых) оценка ленивая: вне окна может вернуться граница."""
         if board.is_checkmate():
             return -9999 if board.turn else 9999
         if board.is_stalemate() or board.is_insufficient_material():
             return 0
 
-        eval = 0
-        piece_values = {
-            chess.PAWN: 100,
-            chess.KNIGHT: 320,
-            chess.BISHOP: 330,
-            chess.ROOK: 500,
-            chess.QUEEN: 900,
-            chess.KING: 10000
-        }
-
-        # Материальная оценка
-        for piece in chess.PIECE_TYPES:
-            eval += len(board.pieces(piece, chess.WHITE)) * piece_values[piece]
-            eval -= len(board.pieces(piece, chess.BLACK)) * piece_values[piece]
-
-        # Пешечные структуры
-        eval -= 20 * self.calculate_pawn_islands(board, chess.WHITE)
-        eval += 20 * self.calculate_pawn_islands(board, chess.BLACK)
-
-        eval -= 15 * self.calculate_isolated_pawns(board, chess.WHITE)
-        eval += 15 * self.calculate_isolated_pawns(board, chess.BLACK)
-
-        eval -= 10 * self.calculate_doubled_pawns(board, chess.WHITE)
-        eval += 10 * self.calculate_doubled_pawns(board, chess.BLACK)
-
-        # Контроль центра
-        center_squares = [chess.E4, chess.D4, chess.E5, chess.D5]
-        for square in center_squares:
-            if board.piece_at(square):
-                piece = board.piece_at(square)
-                if piece.color == chess.WHITE:
-                    eval += 20
-                else:
-                    eval -= 20
-
-        # Пространственное преимущество
-        eval += self.spatial_advantage(board, chess.WHITE) * 15
-        eval -= self.spatial_advantage(board, chess.BLACK) * 15
-
-        return eval
-
-    def sort_moves(self, board, moves, killer_moves, depth):
-        """Сортируем ходы с учетом предыдущего лучшего хода и "убийственных" ходов."""
-        def move_priority(move):
-            # Присваиваем высокий приоритет захватам и угрозам
-            score = 0
-            if board.is_capture(move):
-                score += 1000
-            if board.gives_check(move):
-                score += 500
-            if move in killer_moves.get(depth, []):
-                score += 2000  # "Убийственные" ходы
-
-            return score
-
-        return sorted(moves, key=lambda move: move_priority(move), reverse=True)
-
-    def minimax(self, board, depth, alpha, beta, maximizing_player, previous_best_move=None):
-        board_fen = board.fen()
-
-        if board_fen in self.transposition_table and self.transposition_table[board_fen]['depth'] >= depth:
-            return self.transposition_table[board_fen]['eval'], previous_best_move
-
-        repetition_penalty = -50 if board_fen in self.position_history else 0
+        if self.bitbases is not None:
+            known = self.endgame_score(board)
+            if known is not None:
+                return known
+
+        game_state = self.game_state if state is not None else None
+        if alpha is not None:
+            return self.evaluator.evaluate_lazy(board, alpha, beta, state, game_state)
+        return self.evaluator.evaluate(board, state, game_state)
+
+    def endgame_score(self, board, result=None):
+        """Результат по битовым таблицам (за белых) или None, если позиция не покрыта.
+
+        Ничья точная, выигрыш - KNOWN_WIN_SCORE плюс эвристика продвижения к мату."""
+        if result is None:
+            result = self.bitbases.probe(board)
+        if result is None:
+            return None
+        if result == DRAW:
+            return 0
+        winner = board.turn if result == WIN else not board.turn
+        loser_king = board.king(not winner)
+        # Внутри выигрыша ведем к цели: прижать короля к краю, подвести своего, продвинуть пешку
+        file, rank = chess.square_file(loser_king), chess.square_rank(loser_king)
+        progress = 10 * (6 - min(file, 7 - file) - min(rank, 7 - rank))
+        progress += 4 * (14 - chess.square_manhattan_distance(board.king(winner), loser_king))
+        for square in board.pieces(chess.PAWN, winner):
+            progress += 10 * (chess.square_rank(square) if winner == chess.WHITE else 7 - chess.square_rank(square))
+        for piece_type in (chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN):
+            progress += len(board.pieces(piece_type, winner)) * PIECE_VALUES[piece_type] // 10
+        score = KNOWN_WIN_SCORE + progress
+        return score if winner == chess.WHITE else -score
+
+    def bitbase_cutoff(self, board, key, depth):
+        """Оценка (за белых), на которой поиск узла, покрытого битовыми таблицами, останавливается.
+
+        Ничья точная и сохраняется как EXACT. Проигранную стороной корня позицию искать дальше
+        незачем, но ее оценка эвристическая и в таблицу не попадает. Выигрыш стороны корня
+        ищется дальше: мат находит поиск, а на горизонте оценка ведет к нему. Возвращает None,
+        если поиск нужно продолжить."""
+        result = self.bitbases.probe(board)
+        if result is None:
+            return None
+        if result != DRAW and (result == WIN) == (board.turn == self.root_color):
+            return None  # Выигрыш стороны корня
+        self.controller.node()
+        if result == DRAW:
+            self.transposition_table.store(key, depth, 0, EXACT)
+            return 0
+        return self.endgame_score(board, result)
+
+    def sort_moves(self, board, moves, ply, hash_move=None):
+        """Сортируем ходы: ход из таблицы транспозиций, взятия, "убийственные" ходы, история."""
+        return self.move_ordering.order(board, moves, ply, hash_move)
+
+    def minimax(self, board, depth, alpha, beta, maximizing_player, previous_best_move=None, key=None):
+        if key is None:
+            key = zobrist_hash(board)
+            self.reset_eval_state(board)
+            self.root_ply = len(board.move_stack)
+            self.root_color = board.turn
+
+        alpha_orig, beta_orig = alpha, beta
+        repeated = key in self.position_history
+        entry = self.transposition_table.probe(key)
+        stats = self.stats
+        if stats is not None:
+            stats.tt_probe(entry)
+        hash_move = previous_best_move
+        if entry is not None:
+            if entry.move is not None:
+                hash_move = entry.move
+            # Оценка повторенной позиции зависит от истории партии: из таблицы берем только ход
+            if not repeated and entry.depth >= depth and (entry.bound == EXACT or
+                                         (entry.bound == LOWER_BOUND and entry.score >= beta) or
+                                         (entry.bound == UPPER_BOUND and entry.score <= alpha)):
+                if stats is not None:
+                    stats.tt_cutoffs += 1
+                return entry.score, hash_move
+
+        repetition_penalty = 0
+        if repeated:
+            repetition_penalty = -REPETITION_PENALTY if self.root_color == chess.WHITE else REPETITION_PENALTY
+
+        if self.bitbases is not None and depth != self.root_depth and chess.popcount(board.occupied) <= 4:
+            known = self.bitbase_cutoff(board, key, depth)
+            if known is not None:
+                return known, previous_best_move
+
+        if board.is_game_over():
+            self.controller.node()
+            eval = self.evaluate_board(board, self.eval_state) + repetition_penalty
+            if not repeated:
+                self.transposition_table.store(key, depth, eval, EXACT)
+            return eval, previous_best_move
 
-        if depth == 0 or board.is_game_over():
-            eval = self.evaluate_board(board) + repetition_penalty
-            self.transposition_table[board_fen] = {'eval': eval, 'depth': depth}
+        if depth == 0:
+            # На горизонте досчитываем взятия, чтобы не оценивать позицию посреди размена
+            eval = self.quiescence(board, alpha, beta, maximizing_player, key) + repetition_penalty
+            self.store_result(key, 0, eval, alpha_orig, beta_orig, None)
             return eval, previous_best_move
 
+        self.controller.node()
+
         best_move = None
-        killer_moves_at_depth = self.killer_moves.get(depth, [])
         moves = list(board.legal_moves)
 
-        # Сортируем ходы с учетом захватов, угроз и предыдущих лучших ходов
-        if previous_best_move:
-            moves.insert(0, previous_best_move)  # Проверяем лучший ход первым
-        moves = self.sort_moves(board, moves, self.killer_moves, depth)
+        # Сортируем ходы с учетом захватов, лучшего хода из таблицы транспозиций и истории
+        if hash_move not in moves:
+            hash_move = None
+        ply = len(board.move_stack) - self.root_ply
+        moves = self.sort_moves(board, moves, ply, hash_move)
 
         if maximizing_player:
             max_eval = -math.inf
 
-            for move in moves:
-                board.push(move)
-                eval, _ = self.minimax(board, depth - 1, alpha, beta, False)
-                board.pop()
+            for index, move in enumerate(moves):
+                child_key = self.make_move(board, move, key)
+                eval, _ = self.minimax(board, depth - 1, alpha, beta, False, key=child_key)
+                self.unmake_move(board)
                 eval += repetition_penalty
 
                 if eval > max_eval:
                     max_eval = eval
                     best_move = move
+                    if depth == self.root_depth:
+                        # Запоминаем лучший полностью просчитанный ход корня на случай прерывания
+                        self.controller.root_best_move = best_move
+                        self.controller.root_best_eval = max_eval
 
                 alpha = max(alpha, eval)
                 if eval >= beta:
-                    # Сохраняем убийственные ходы
-                    self.killer_moves.setdefault(depth, []).append(move)
+                    # Сохраняем убийственные ходы и историю
+                    self.record_cutoff(board, move, ply, depth, index)
                     break
 
-            self.transposition_table[board_fen] = {'eval': max_eval, 'depth': depth}
+            self.store_result(key, depth, max_eval, alpha_orig, beta_orig, best_move)
             return max_eval, best_move
         else:
             min_eval = math.inf
 
-            for move in moves:
-                board.push(move)
-                eval, _ = self.minimax(board, depth - 1, alpha, beta, True)
-                board.pop()
+            for index, move in enumerate(moves):
+                child_key = self.make_move(board, move, key)
+                eval, _ = self.minimax(board, depth - 1, alpha, beta, True, key=child_key)
+                self.unmake_move(board)
                 eval += repetition_penalty
 
                 if eval < min_eval:
                     min_eval = eval
                     best_move = move
+                    if depth == self.root_depth:
+                        # Запоминаем лучший полностью просчитанный ход корня на случай прерывания
+                        self.controller.root_best_move = best_move
+                        self.controller.root_best_eval = min_eval
 
                 beta = min(beta, eval)
                 if eval <= alpha:
-                    self.killer_moves.setdefault(depth, []).append(move)
+                    self.record_cutoff(board, move, ply, depth, index)
                     break
 
-            self.transposition_table[board_fen] = {'eval': min_eval, 'depth': depth}
+            self.store_result(key, depth, min_eval, alpha_orig, beta_orig, best_move)
             return min_eval, best_move
 
-    def find_best_move(self, board, max_time=5):
-        start_time = time.time()
+    def tt_probe_relative(self, key, sign):
+        """Запись таблицы с оценкой относительно стороны хода (в таблице оценки хранятся за белых)."""
+        entry = self.transposition_table.probe(key)
+        if entry is not None and sign < 0:
+            entry.score = -entry.score
+            if entry.bound == LOWER_BOUND:
+                entry.bound = UPPER_BOUND
+            elif entry.bound == UPPER_BOUND:
+                entry.bound = LOWER_BOUND
+        return entry
+
+    def negamax(self, board, depth, alpha, beta, key, allow_null=True):
+        """Выборочный поиск (negamax PVS) с оценками относительно стороны хода."""
+        options = self.selective
+        sign = 1 if board.turn == chess.WHITE else -1
+        pv_node = beta - alpha > 1
+        alpha_orig = alpha
+
+        repeated = key in self.position_history
+        entry = self.tt_probe_relative(key, sign)
+        stats = self.stats
+        if stats is not None:
+            stats.tt_probe(entry)
+        hash_move = None
+        if entry is not None:
+            hash_move = entry.move
+            if not repeated and entry.depth >= depth and not (pv_node and depth == self.root_depth) and \
+                    (entry.bound == EXACT or (entry.bound == LOWER_BOUND and entry.score >= beta) or
+                     (entry.bound == UPPER_BOUND and entry.score <= alpha)):
+                if stats is not None:
+                    stats.tt_cutoffs += 1
+                return entry.score, hash_move
+
+        # Штраф за повторение - против стороны корня, в знаке стороны хода этого узла
+        repetition_penalty = 0
+        if repeated:
+            repetition_penalty = -REPETITION_PENALTY if board.turn == self.root_color else REPETITION_PENALTY
+
+        if self.bitbases is not None and depth != self.root_depth and chess.popcount(board.occupied) <= 4:
+            known = self.bitbase_cutoff(board, key, depth)
+            if known is not None:
+                return sign * known, None
+
+        if board.is_game_over():
+            self.controller.node()
+            return sign * self.evaluate_board(board, self.eval_state) + repetition_penalty, None
+
+        if depth <= 0:
+            if sign > 0:
+                eval = self.quiescence(board, alpha, beta, True, key)
+            else:
+                eval = -self.quiescence(board, -beta, -alpha, False, key)
+            return eval + repetition_penalty, None
+
+        self.controller.node()
+        in_check = board.is_check()
+        ply = len(board.move_stack) - self.root_ply
+
+        static_eval = None
+        if not in_check and not pv_node and (options['null_move'] or options['futility']):
+            static_eval = sign * self.evaluate_board(board, self.eval_state)
+
+        # Нулевой ход; не применяем под шахом, подряд и без фигур (риск цугцванга)
+        if options['null_move'] and allow_null and static_eval is not None and depth >= NULL_MOVE_MIN_DEPTH \
+                and static_eval >= beta and self.has_non_pawn_material(board, board.turn):
+            reduction = 2 + depth // 4
+            child_key = self.make_move(board, chess.Move.null(), key)
+            eval, _ = self.negamax(board, depth - 1 - reduction, -beta, -beta + 1, child_key, False)
+            self.unmake_move(board)
+            if -eval >= beta:
+                return beta, None
+
+        futile = options['futility'] and static_eval is not None and depth < len(FUTILITY_MARGINS) \
+            and static_eval + FUTILITY_MARGINS[depth] <= alpha
+
+        moves = list(board.legal_moves)
+        if hash_move not in moves:
+            hash_move = None
+        moves = self.sort_moves(board, moves, ply, hash_move)
+
+        best_eval = -INFINITE_SCORE
         best_move = None
+        pruned = False
+        for index, move in enumerate(moves):
+            quiet = not (move.promotion or board.is_capture(move))
+            if index > 0 and quiet and (futile or (options['lmr'] and depth >= LMR_MIN_DEPTH
+                                                   and index >= LMR_MIN_INDEX and not in_check)):
+                gives_check = board.gives_check(move)
+            else:
+                gives_check = True
+            if futile and index > 0 and not gives_check:
+                pruned = True
+                continue  # Тихий ход не поднимет оценку до alpha
+
+            child_key = self.make_move(board, move, key)
+            if index == 0 or not options['pvs']:
+                eval = -self.negamax(board, depth - 1, -beta, -alpha, child_key)[0]
+            else:
+                reduction = 0
+                if options['lmr'] and not gives_check and depth >= LMR_MIN_DEPTH and index >= LMR_MIN_INDEX:
+                    reduction = 1 if index < 2 * LMR_MIN_INDEX else 2
+                eval = -self.negamax(board, depth - 1 - reduction, -alpha - 1, -alpha, child_key)[0]
+                if eval > alpha and reduction:
+                    eval = -self.negamax(board, depth - 1, -alpha - 1, -alpha, child_key)[0]
+                if alpha < eval < beta:
+                    eval = -self.negamax(board, depth - 1, -beta, -alpha, child_key)[0]
+            self.unmake_move(board)
+            eval += repetition_penalty
+
+            if eval > best_eval:
+                best_eval = eval
+                best_move = move
+            if eval > alpha:
+                alpha = eval
+                if depth == self.root_depth:
+                    # Запоминаем лучший полностью просчитанный ход корня на случай прерывания
+                    self.controller.root_best_move = move
+                    self.controller.root_best_eval = eval
+            if alpha >= beta:
+                self.record_cutoff(board, move, ply, depth, index)
+                break
+
+        if pruned:
+            # Отброшенные ходы доказаны только не выше static_eval + запас: граница не ниже нее
+            best_eval = max(best_eval, static_eval + FUTILITY_MARGINS[depth])
+        if best_move is None:
+            # Все ходы отброшены как бесперспективные
+            return best_eval, None
+
+        self.store_result(key, depth, sign * best_eval,
+                          *((alpha_orig, beta) if sign > 0 else (-beta, -alpha_orig)), best_move)
+        return best_eval, best_move
+
+    def aspiration_search(self, board, depth, key, previous_score):
+        """Итерация выборочного поиска с окном вокруг оценки предыдущей итерации."""
+        if previous_score is None or not self.selective['aspiration'] or depth < 2:
+            return self.negamax(board, depth, -INFINITE_SCORE, INFINITE_SCORE, key)
+
+        window = ASPIRATION_WINDOW
+        alpha, beta = previous_score - window, previous_score + window
+        while True:
+            score, move = self.negamax(board, depth, alpha, beta, key)
+            if score <= alpha:
+                alpha = max(-INFINITE_SCORE, alpha - window)
+            elif score >= beta:
+                beta = min(INFINITE_SCORE, beta + window)
+            else:
+                return score, move
+            window *= 4
+
+    def has_non_pawn_material(self, board, color):
+        return bool(board.occupied_co[color] & ~(board.pawns | board.kings))
+
+    def quiescence(self, board, alpha, beta, maximizing_player, key):
+        """Форсированный поиск: только взятия и превращения (под шахом - все ответы).
+
+        Оценка "стоя на месте" дает отсечение, взятия сортируются по MVV-LVA,
+        проигрывающие по SEE взятия отбрасываются.
+        """
+        self.controller.qnode()
+
+        if board.is_check():
+            moves = list(board.legal_moves)
+            if not moves:
+                return self.evaluate_board(board, self.eval_state)
+            best_eval = -math.inf if maximizing_player else math.inf
+        else:
+            stand_pat = self.evaluate_board(board, self.eval_state, alpha, beta)
+            if maximizing_player:
+                if stand_pat >= beta:
+                    return stand_pat
+                alpha = max(alpha, stand_pat)
+            else:
+                if stand_pat <= alpha:
+                    return stand_pat
+                beta = min(beta, stand_pat)
+            best_eval = stand_pat
+            moves = [move for move in board.generate_legal_moves()
+                     if (move.promotion or board.is_capture(move)) and static_exchange_evaluation(board, move) >= 0]
+
+        moves.sort(key=lambda move: mvv_lva(board, move) if board.is_capture(move) or move.promotion else -1,
+                   reverse=True)
+
+        for move in moves:
+            child_key = self.make_move(board, move, key)
+            eval = self.quiescence(board, alpha, beta, not maximizing_player, child_key)
+            self.unmake_move(board)
+
+            if maximizing_player:
+                if eval > best_eval:
+                    best_eval = eval
+                alpha = max(alpha, eval)
+            else:
+                if eval < best_eval:
+                    best_eval = eval
+                beta = min(beta, eval)
+            if alpha >= beta:
+                break
+
+        return best_eval
+
+    def new_game(self):
+        """Очищает таблицы, накопленные за партию: транспозиции, сортировку ходов и кэши оценщика."""
+        self.transposition_table.clear()  # Кэш анализа (self.cache) сохраняется между партиями
+        self.move_ordering.clear()
+        self.evaluator.clear()
+        self.position_history = set()
+
+    def load_game(self, board, ordering=None):
+        """Переключает бот на партию board: история позиций из ходов партии и таблицы сортировки
+        (MoveOrdering.state() этой партии или None). Таблица транспозиций остается общей для партий."""
+        replay = board.root()
+        key = zobrist_hash(replay)
+        history = set()
+        for move in board.move_stack:
+            history.add(key)
+            key = push_with_key(replay, move, key)
+        self.position_history = history
+        self.move_ordering.load_state(ordering)
+
+    def reset_eval_state(self, board):
+        """Пересчитывает состояния оценки для корня поиска."""
+        self.eval_state.reset(board)
+        if self.game_state is not None:
+            self.game_state.reset(board)
+
+    def make_move(self, board, move, key):
+        """Делает ход в поиске, обновляя ключ Zobrist и аккумуляторы оценки."""
+        self.eval_state.push(board, move)
+        if self.game_state is not None:
+            self.game_state.push(board, move)
+        return push_with_key(board, move, key)
+
+    def unmake_move(self, board):
+        """Отменяет ход, сделанный через make_move."""
+        board.pop()
+        self.eval_state.pop()
+        if self.game_state is not None:
+            self.game_state.pop()
+
+    def record_cutoff(self, board, move, ply, depth, index):
+        """Отсечение на ходе с номером index: таблицы сортировки и статистика."""
+        self.move_ordering.record_cutoff(board, move, ply, depth, index)
+        if self.stats is not None:
+            self.stats.beta_cutoff(index)
+
+    def warm_start(self, board, key):
+        """Переносит в таблицу транспозиций записи кэша анализа для корня и его потомков."""
+        table = self.transposition_table
+        entry = self.cache.probe(key)
+        if entry is not None:
+            table.store(key, entry.depth, entry.score, entry.bound, entry.move)
+        for move in board.legal_moves:
+            child_key = push_with_key(board, move, key)
+            entry = self.cache.probe(child_key)
+            board.pop()
+            if entry is not None:
+                table.store(child_key, entry.depth, entry.score, entry.bound, entry.move)
+
+    def save_to_cache(self, board, key):
+        """Сохраняет в кэш анализа записи таблицы транспозиций по главному варианту."""
+        board = board.copy()
+        for move in self.principal_variation(board, self.controller.completed_depth):
+            entry = self.transposition_table.probe(key)
+            if entry is None:
+                break
+            self.cache.store(key, entry.depth, entry.score, entry.bound, entry.move)
+            key = push_with_key(board, move, key)
+
+    def principal_variation(self, board, max_length=None):
+        """Главный вариант по лучшим ходам из таблицы транспозиций."""
+        max_length = max_length or self.depth
+        board = board.copy()
+        pv = []
+        seen = set()
+        key = zobrist_hash(board)
+        while len(pv) < max_length and key not in seen:
+            seen.add(key)
+            entry = self.transposition_table.probe(key)
+            if entry is None or entry.move is None or not board.is_legal(entry.move):
+                break
+            pv.append(entry.move)
+            key = push_with_key(board, entry.move, key)
+        return pv
+
+    def store_result(self, key, depth, eval, alpha, beta, best_move):
+        """Сохраняет результат узла с типом оценки относительно исходного окна [alpha, beta].
+
+        Позиции из истории партии не сохраняются: их оценка включает штраф за повторение,
+        а таблица транспозиций (и кэш анализа) общая для разных партий."""
+        if key in self.position_history:
+            return
+        if eval <= alpha:
+            bound = UPPER_BOUND
+        elif eval >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.transposition_table.store(key, depth, eval, bound, best_move)
+
+    def find_best_move(self, board, max_time=5, max_nodes=None, time_manager=None, controller=None):
+        """Итеративное углубление с прерыванием по времени и числу узлов внутри поиска.
+
+        Возвращает ход последней завершенной итерации или, если прерванная итерация
+        успела полностью просчитать хотя бы первый ход корня, ее лучший ход.
+        Достигнутая глубина сохраняется в self.controller.completed_depth.
+        time_manager (TimeManager по часам партии) заменяет max_time своим жестким лимитом
+        и после каждой итерации решает, продолжать ли поиск.
+        controller - готовый SearchController вместо max_time, max_nodes и time_manager: его
+        лимиты можно менять из другого потока еще до начала поиска (ponderhit в uci.py).
+        """
+        if controller is None:
+            if time_manager is not None:
+                max_time = time_manager.hard_limit
+            controller = SearchController(max_time, max_nodes, stop_event=self.stop_event)
+            controller.time_manager = time_manager
+        self.controller = controller
+
+        if self.book is not None:
+            move = self.book.choose(board)
+            if move is not None and board.is_legal(move):
+                return move
+
+        best_move = None
+        stats = self.stats
+        if stats is not None:
+            stats.reset()
+        self.transposition_table.new_search()
+        self.move_ordering.new_search()
+        key = zobrist_hash(board)
+        self.reset_eval_state(board)
+        root_ply = self.root_ply = len(board.move_stack)
+        self.root_color = board.turn
+        root_moves = board.legal_moves.count()
+        score = None
+
+        if self.cache is not None:
+            cached = self.cache.probe(key)
+            if cached is not None and cached.bound == EXACT and cached.depth >= self.depth and \
+                    cached.move is not None and board.is_legal(cached.move):
+                # Результат достаточной глубины уже есть в кэше
+                sign = 1 if board.turn == chess.WHITE else -1
+                self.controller.complete_iteration(cached.depth, sign * cached.score)
+                return cached.move
+            self.warm_start(board, key)
 
         for depth in range(1, self.depth + 1):
-            if time.time() - start_time > max_time:
+            if self.controller.time_left() <= 0:
                 break  # Прерываем, если время вышло
-            _, move = self.minimax(board, depth, -math.inf, math.inf, board.turn, best_move)
+            self.root_depth = depth
+            self.controller.root_best_move = None
+            try:
+                if self.selective:
+                    score, move = self.aspiration_search(board, depth, key, score)
+                else:
+                    score, move = self.minimax(board, depth, -math.inf, math.inf, board.turn, best_move, key)
+                    score = score if board.turn == chess.WHITE else -score
+            except SearchAborted:
+                # Возвращаем доску и аккумуляторы в корневую позицию
+                while len(board.move_stack) > root_ply:
+                    self.unmake_move(board)
+                if self.controller.root_best_move is not None:
+                    best_move = self.controller.root_best_move
+                break
             if move:
                 best_move = move
-
+            self.controller.complete_iteration(depth, score)  # Оценка относительно стороны хода
+            if stats is not None:
+                pv = self.principal_variation(board, depth)
+                if best_move is not None and (not pv or pv[0] != best_move):
+                    pv = [best_move]
+                iteration = stats.add_iteration(depth, score, self.controller, pv)
+                if self.on_iteration is not None:
+                    self.on_iteration(stats, iteration)
+            manager = self.controller.time_manager  # Может появиться во время поиска (ponderhit)
+            if manager is not None and not manager.continue_search(depth, best_move, score, root_moves):
+                break
+        self.root_depth = None
+
+        if best_move is None:
+            # Даже при нулевом бюджете возвращаем легальный ход
+            best_move = next(iter(board.legal_moves), None)
+        if self.cache is not None and self.controller.completed_depth:
+            self.save_to_cache(board, key)
+        if stats is not None:
+            stats.finish(best_move, self.controller)
+            if self.stats_log is not None:
+                with open(self.stats_log, 'a', encoding='utf-8') as log:
+                    log.write(stats.to_json() + "\n")
         return best_move
@@ -0,0 +1,96 @@
+import chess
+
+PIECE_VALUES = {
+    chess.PAWN: 100,
+    chess.KNIGHT: 320,
+    chess.BISHOP: 330,
+    chess.ROOK: 500,
+    chess.QUEEN: 900,
+    chess.KING: 10000
+}
+
+CENTER_SQUARES = [chess.E4, chess.D4, chess.E5, chess.D5]
+CENTER_BONUS = 20
+
+
+def build_piece_square_tables():
+    """Таблицы фигура-поле: бонус за занятие центра любой фигурой (с точки зрения белых)."""
+    tables = {}
+    for color in chess.COLORS:
+        sign = 1 if color == chess.WHITE else -1
+        for piece_type in chess.PIECE_TYPES:
+            table = [0] * 64
+            for square in CENTER_SQUARES:
+                table[square] = sign * CENTER_BONUS
+            tables[color, piece_type] = table
+    return tables
+
+
+PIECE_SQUARE_TABLES = build_piece_square_tables()
+
+
+class EvalState:
+    """Аккумуляторы материала и фигура-поле, обновляемые при каждом ходе поиска."""
+
+    def __init__(self, board=None, tables=PIECE_SQUARE_TABLES):
+        self.tables = tables
+        self.material = 0
+        self.psqt = 0
+        self.stack = []
+        if board is not None:
+            self.reset(board)
+
+    def reset(self, board):
+        """Пересчитывает аккумуляторы с нуля для позиции на доске."""
+        self.material = 0
+        self.psqt = 0
+        self.stack = []
+        for square, piece in board.piece_map().items():
+            self.add_piece(piece.piece_type, piece.color, square)
+
+    def add_piece(self, piece_type, color, square):
+        value = PIECE_VALUES[piece_type]
+        self.material += value if color == chess.WHITE else -value
+        self.psqt += self.tables[color, piece_type][square]
+
+    def remove_piece(self, piece_type, color, square):
+        value = PIECE_VALUES[piece_type]
+        self.material -= value if color == chess.WHITE else -value
+        self.psqt -= self.tables[color, piece_type][square]
+
+    def push(self, board, move):
+        """Обновляет аккумуляторы для хода; вызывается до board.push(move)."""
+        self.stack.append((self.material, self.psqt))
+        if not move:
+            return
+
+        color = board.turn
+        from_square = move.from_square
+        to_square = move.to_square
+        piece_type = board.piece_type_at(from_square)
+
+        if board.is_castling(move):
+            rank = chess.square_rank(from_square)
+            if board.color_at(to_square) == color:
+                rook_square = to_square
+            else:
+                rook_square = chess.square(7 if to_square > from_square else 0, rank)
+            kingside = rook_square > from_square
+            self.remove_piece(chess.KING, color, from_square)
+            self.remove_piece(chess.ROOK, color, rook_square)
+            self.add_piece(chess.KING, color, chess.square(6 if kingside else 2, rank))
+            self.add_piece(chess.ROOK, color, chess.square(5 if kingside else 3, rank))
+            return
+
+        captured_type = board.piece_type_at(to_square)
+        if captured_type is not None:
+            self.remove_piece(captured_type, not color, to_square)
+        elif piece_type == chess.PAWN and to_square == board.ep_square:
+            self.remove_piece(chess.PAWN, not color, to_square - 8 if color == chess.WHITE else to_square + 8)
+
+        self.remove_piece(piece_type, color, from_square)
+        self.add_piece(move.promotion or piece_type, color, to_square)
+
+    def pop(self):
+        """Восстанавливает аккумуляторы после board.pop()."""
+        self.material, self.psqt = self.stack.pop()
@@ -0,0 +1,2 @@
+from evaluate.backends import (Evaluator, FastEvaluator, ClassicEvaluator, FullEvaluator,
+                               EVALUATORS, register_evaluator, get_evaluator, available_evaluators)
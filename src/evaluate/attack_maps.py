@@ -0,0 +1,51 @@
+import chess
+
+
+def piece_attacks(piece_type, color, square, occupied):
+    """Битборд атак фигуры по предрасчитанным таблицам python-chess."""
+    if piece_type == chess.PAWN:
+        return chess.BB_PAWN_ATTACKS[color][square]
+    if piece_type == chess.KNIGHT:
+        return chess.BB_KNIGHT_ATTACKS[square]
+    if piece_type == chess.KING:
+        return chess.BB_KING_ATTACKS[square]
+
+    attacks = 0
+    if piece_type == chess.BISHOP or piece_type == chess.QUEEN:
+        attacks |= chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+    if piece_type == chess.ROOK or piece_type == chess.QUEEN:
+        attacks |= (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied] |
+                    chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied])
+    return attacks
+
+
+class AttackMaps:
+    """Карты атак обоих цветов, вычисляемые один раз на оцениваемую позицию."""
+
+    def __init__(self, board):
+        occupied = board.occupied
+        self.occupied_co = (board.occupied_co[chess.BLACK], board.occupied_co[chess.WHITE])
+        self.attacks = [0, 0]        # Объединение атак по цвету
+        self.mobility = [0, 0]       # Сумма атакуемых полей по всем фигурам цвета
+
+        for color in chess.COLORS:
+            union = 0
+            mobility = 0
+            for piece_type in chess.PIECE_TYPES:
+                for square in chess.scan_reversed(board.pieces_mask(piece_type, color)):
+                    attacks = piece_attacks(piece_type, color, square, occupied)
+                    union |= attacks
+                    mobility += chess.popcount(attacks)
+            self.attacks[color] = union
+            self.mobility[color] = mobility
+
+    def is_attacked_by(self, color, square):
+        return bool(self.attacks[color] & chess.BB_SQUARES[square])
+
+    def space(self, color):
+        """Число полей, атакуемых хотя бы одной фигурой цвета."""
+        return chess.popcount(self.attacks[color])
+
+    def hanging(self, color):
+        """Битборд фигур цвета, которые атакованы соперником и не защищены."""
+        return self.occupied_co[color] & self.attacks[not color] & ~self.attacks[color]
@@ -0,0 +1,159 @@
+import chess
+
+from eval_state import EvalState, PIECE_VALUES, CENTER_SQUARES
+from evaluate.attack_maps import AttackMaps
+from evaluate.game_state import GameState
+from evaluate.lazy import LazyStats, lazy_evaluate, load_margins
+from evaluate.pawn_hash import PawnHashTable
+from evaluate.weights import WEIGHTS
+
+SPACE_WEIGHT = WEIGHTS['space']
+
+
+EVALUATORS = {}
+
+
+def register_evaluator(evaluator_class):
+    """Добавляет класс оценщика в реестр под его именем; можно использовать как декоратор."""
+    EVALUATORS[evaluator_class.name] = evaluator_class
+    return evaluator_class
+
+
+class Evaluator:
+    """Интерфейс оценки позиции (за белых) без учета мата, пата и битовых таблиц - их проверяет поиск.
+
+    cost - примерная стоимость одной оценки в поиске (мкс): цейтнот и массовый анализ берут
+    дешевые оценщики, глубокий анализ - богатые. needs_game_state - нужен ли поиску GameState.
+    stages - стадии ленивой оценки (stage_scores); запасы между стадиями берутся из
+    evaluate/lazy_margins.json (build_lazy_margins.py), без них оценка всегда полная.
+    """
+
+    name = None
+    cost = 0
+    needs_game_state = False
+    stages = ()
+
+    def __init__(self):
+        self.margins = load_margins(self.name) if len(self.stages) > 1 else None
+        self.lazy_stats = LazyStats(self.stages)
+
+    def evaluate(self, board, eval_state=None, game_state=None):
+        raise NotImplementedError
+
+    def stage_scores(self, board, eval_state=None, game_state=None):
+        """Накопленная оценка после каждой стадии, от дешевых признаков к дорогим."""
+        yield self.evaluate(board, eval_state, game_state)
+
+    def evaluate_lazy(self, board, alpha, beta, eval_state=None, game_state=None):
+        """Оценка для окна [alpha, beta]: за пределами окна может вернуть границу вместо точной оценки."""
+        if self.margins is None:
+            return self.evaluate(board, eval_state, game_state)
+        return lazy_evaluate(self.stage_scores(board, eval_state, game_state), self.margins, alpha, beta,
+                             self.lazy_stats)
+
+    def clear(self):
+        """Сбрасывает кэши оценщика (новая партия)."""
+
+
+@register_evaluator
+class FastEvaluator(Evaluator):
+    """Только материал и таблицы фигура-поле (из аккумуляторов поиска)."""
+
+    name = 'fast'
+    cost = 1
+
+    def evaluate(self, board, eval_state=None, game_state=None):
+        if eval_state is None:
+            eval_state = EvalState(board)
+        return eval_state.material + eval_state.psqt
+
+
+@register_evaluator
+class ClassicEvaluator(Evaluator):
+    """Признаки ChessBot: материал, центр, пешечная структура из пешечного кэша и пространство."""
+
+    name = 'classic'
+    cost = 35
+    stages = ('material', 'pawns', 'space')
+
+    def __init__(self, pawn_hash=None):
+        super().__init__()
+        self.pawn_hash = pawn_hash if pawn_hash is not None else PawnHashTable()
+
+    def clear(self):
+        self.pawn_hash.clear()
+
+    def evaluate(self, board, eval_state=None, game_state=None):
+        for eval in self.stage_scores(board, eval_state, game_state):
+            pass
+        return eval
+
+    def stage_scores(self, board, eval_state=None, game_state=None):
+        if eval_state is not None:
+            eval = eval_state.material + eval_state.psqt
+        else:
+            eval = 0
+
+            # Материальная оценка
+            for piece in chess.PIECE_TYPES:
+                eval += len(board.pieces(piece, chess.WHITE)) * PIECE_VALUES[piece]
+                eval -= len(board.pieces(piece, chess.BLACK)) * PIECE_VALUES[piece]
+
+            # Контроль центра
+            for square in CENTER_SQUARES:
+                if board.piece_at(square):
+                    piece = board.piece_at(square)
+                    if piece.color == chess.WHITE:
+                        eval += 20
+                    else:
+                        eval -= 20
+        yield eval
+
+        # Пешечные структуры (острова, изолированные, сдвоенные и проходные пешки) из пешечного кэша
+        eval += self.pawn_hash.probe(board).score
+        yield eval
+
+        # Пространственное преимущество - самая дорогая часть (карты атак)
+        attack_maps = AttackMaps(board)
+        eval += attack_maps.space(chess.WHITE) * SPACE_WEIGHT
+        eval -= attack_maps.space(chess.BLACK) * SPACE_WEIGHT
+        yield eval
+
+
+@register_evaluator
+class FullEvaluator(Evaluator):
+    """Полная оценка пакета evaluate (evaluator.py) со стадиями партии по GameState."""
+
+    name = 'full'
+    cost = 300
+    needs_game_state = True
+    stages = ('material', 'activity', 'phase')
+
+    def evaluate(self, board, eval_state=None, game_state=None):
+        from evaluate.evaluator import evaluate_board
+        if game_state is None:
+            game_state = GameState(board)
+        return round(evaluate_board(board, game_state))  # Таблица транспозиций хранит целые оценки
+
+    def stage_scores(self, board, eval_state=None, game_state=None):
+        from evaluate.evaluator import stage_scores
+        if game_state is None:
+            game_state = GameState(board)
+        return stage_scores(board, game_state)
+
+    def evaluate_lazy(self, board, alpha, beta, eval_state=None, game_state=None):
+        return round(super().evaluate_lazy(board, alpha, beta, eval_state, game_state))
+
+
+def get_evaluator(evaluator='classic'):
+    """Оценщик по имени из реестра; готовый объект Evaluator возвращается как есть."""
+    if isinstance(evaluator, Evaluator):
+        return evaluator
+    if evaluator not in EVALUATORS:
+        raise ValueError(f"Unknown evaluator: {evaluator} (available: {', '.join(available_evaluators())})")
+    return EVALUATORS[evaluator]()
+
+
+def available_evaluators():
+    """Имена оценщиков по возрастанию стоимости."""
+    return sorted(EVALUATORS, key=lambda name: EVALUATORS[name].cost)
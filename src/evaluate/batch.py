@@ -0,0 +1,100 @@
+import chess
+import numpy as np
+
+from eval_state import PIECE_VALUES, PIECE_SQUARE_TABLES
+from evaluate.pawn_hash import (PAWN_ISLAND_PENALTY, ISOLATED_PAWN_PENALTY, DOUBLED_PAWN_PENALTY,
+                                PASSED_PAWN_BONUS, PASSED_PAWN_MASKS)
+
+# Плоскости: белые пешка..король (0-5), черные пешка..король (6-11)
+PLANES = [(color, piece_type) for color in (chess.WHITE, chess.BLACK) for piece_type in chess.PIECE_TYPES]
+
+MATERIAL = np.array([PIECE_VALUES[piece_type] * (1 if color == chess.WHITE else -1)
+                     for color, piece_type in PLANES], dtype=np.int64)
+PIECE_SQUARE = np.array([PIECE_SQUARE_TABLES[color, piece_type] for color, piece_type in PLANES], dtype=np.int64)
+
+# PASSED_MASKS[цвет][поле, поле впереди]: матрицы масок проходных пешек
+PASSED_MASKS = [np.array([[(mask >> square) & 1 for square in chess.SQUARES] for mask in PASSED_PAWN_MASKS[color]],
+                         dtype=np.int64) for color in (chess.BLACK, chess.WHITE)]
+PASSED_BONUS = [np.array([PASSED_PAWN_BONUS[chess.square_rank(square) if color else 7 - chess.square_rank(square)]
+                          for square in chess.SQUARES], dtype=np.int64) for color in (chess.BLACK, chess.WHITE)]
+
+
+def encode_board(board):
+    """Двенадцать битбордов позиции в порядке PLANES."""
+    return [board.pieces_mask(piece_type, color) for color, piece_type in PLANES]
+
+
+def encode_boards(boards):
+    """Массив (N, 12) битбордов uint64."""
+    return np.array([encode_board(board) for board in boards], dtype='<u8').reshape(-1, len(PLANES))
+
+
+def to_planes(bitboards):
+    """Распаковка битбордов в (N, 12, 64) нулей и единиц; бит i соответствует полю i."""
+    bitboards = np.ascontiguousarray(bitboards, dtype='<u8')
+    bytes_view = bitboards.view(np.uint8).reshape(len(bitboards), len(PLANES), 8)
+    return np.unpackbits(bytes_view, axis=2, bitorder='little')
+
+
+def pawn_structure_counts(pawn_planes):
+    """Число пешечных островов, изолированных и сдвоенных пешек для плоскостей (N, 64) одного цвета."""
+    counts = pawn_planes.reshape(-1, 8, 8).sum(axis=1, dtype=np.int64)  # (N, вертикаль)
+    has = counts > 0
+    islands = has[:, 0].astype(np.int64) + (has[:, 1:] & ~has[:, :-1]).sum(axis=1)
+    neighbours = np.zeros_like(has)
+    neighbours[:, 1:] |= has[:, :-1]
+    neighbours[:, :-1] |= has[:, 1:]
+    isolated = (counts * ~neighbours).sum(axis=1)
+    doubled = (counts > 1).sum(axis=1)
+    return islands, isolated, doubled
+
+
+def pawn_structure(pawn_planes):
+    """Штраф за пешечные острова, изолированные и сдвоенные пешки для плоскостей (N, 64) одного цвета."""
+    islands, isolated, doubled = pawn_structure_counts(pawn_planes)
+    return (PAWN_ISLAND_PENALTY * islands + ISOLATED_PAWN_PENALTY * isolated +
+            DOUBLED_PAWN_PENALTY * doubled)
+
+
+def passed_pawn_squares(own_planes, enemy_planes, color):
+    """Плоскости (N, 64) проходных пешек цвета color."""
+    blockers = enemy_planes.astype(np.int64) @ PASSED_MASKS[color].T
+    return ((own_planes > 0) & (blockers == 0)).astype(np.int64)
+
+
+def passed_pawn_ranks(own_planes, enemy_planes, color):
+    """Число проходных пешек цвета color по горизонталям, считая от своей стороны: (N, 8)."""
+    passed = passed_pawn_squares(own_planes, enemy_planes, color).reshape(-1, 8, 8).sum(axis=2)
+    return passed if color == chess.WHITE else passed[:, ::-1]
+
+
+def passed_pawns(own_planes, enemy_planes, color):
+    """Бонус за проходные пешки цвета color для плоскостей (N, 64)."""
+    return passed_pawn_squares(own_planes, enemy_planes, color) @ PASSED_BONUS[color]
+
+
+def evaluate_bitboards(bitboards):
+    """Оценки (за белых) для массива (N, 12) битбордов: материал, фигура-поле, центр, пешечная структура и проходные пешки."""
+    planes = to_planes(bitboards)
+    scores = planes.sum(axis=2, dtype=np.int64) @ MATERIAL
+    scores += np.einsum('nps,ps->n', planes, PIECE_SQUARE, dtype=np.int64)
+    scores -= pawn_structure(planes[:, 0])
+    scores += pawn_structure(planes[:, 6])
+    scores += passed_pawns(planes[:, 0], planes[:, 6], chess.WHITE)
+    scores -= passed_pawns(planes[:, 6], planes[:, 0], chess.BLACK)
+    return scores
+
+
+def evaluate_boards(boards):
+    """Пакетная оценка списка досок."""
+    return evaluate_bitboards(encode_boards(boards))
+
+
+def evaluate_children(board, moves):
+    """Пакетная оценка всех позиций после ходов moves (доска возвращается в исходное состояние)."""
+    encoded = []
+    for move in moves:
+        board.push(move)
+        encoded.append(encode_board(board))
+        board.pop()
+    return evaluate_bitboards(np.array(encoded, dtype='<u8').reshape(-1, len(PLANES)))
@@ -1,13 +1,27 @@
 import chess
-from ai.evaluate.evaluator_utils import *
+from evaluate.evaluator_utils import *
+from evaluate.attack_maps import AttackMaps
+from evaluate.pawn_hash import PawnHashTable
+from evaluate.game_state import GameState
 
-def evaluate_board(board):
+pawn_hash = PawnHashTable()  # Общий кэш пешечной структуры для всех вызовов оценки
+STAGES = ('material', 'activity', 'phase')
+
+def evaluate_board(board, state=None):
+    """state - GameState, который поиск обновляет на push/pop; без него восстанавливается из партии.
+    Ленивая оценка по стадиям - FullEvaluator.evaluate_lazy (evaluate/backends.py)."""
     # Проверка окончания игры
     if board.is_checkmate():
         return -9999 if board.turn else 9999
     if board.is_stalemate() or board.is_insufficient_material():
         return 0
 
+    for eval in stage_scores(board, state):
+        pass
+    return eval
+
+def stage_scores(board, state=None):
+    """Накопленная оценка после стадий STAGES: материал, активность фигур (карты атак), фазы партии."""
     eval = 0
     piece_values = {
         chess.PAWN: 100,
@@ -37,124 +51,75 @@ def evaluate_board(board):
         eval -= abs(material_difference) * 0.05  # Белые хотят избежать разменов
     elif material_difference > 0 and board.turn == chess.BLACK:
         eval += abs(material_difference) * 0.05  # Черные хотят избежать разменов
+    yield eval
+
+    # Карты атак считаются один раз и используются всеми признаками
+    attack_maps = AttackMaps(board)
 
     # Оценка защищенности фигур
-    eval += evaluate_piece_safety(board)
+    eval += evaluate_piece_safety(board, attack_maps)
 
     # Контроль центра
     eval += center_control(board, chess.WHITE)
 
     # Пространственное преимущество
-    eval += spatial_advantage(board, chess.WHITE) * 15
-    eval -= spatial_advantage(board, chess.BLACK) * 15
+    eval += spatial_advantage(board, chess.WHITE, attack_maps) * 15
+    eval -= spatial_advantage(board, chess.BLACK, attack_maps) * 15
 
     # Мобильность (количество возможных ходов)
-    mobility_bonus = 0
-    for color in [chess.WHITE, chess.BLACK]:
-        for square in board.piece_map():
-            piece = board.piece_at(square)
-            if piece.color == color:
-                mobility_bonus += len(list(board.attacks(square)))
+    mobility_bonus = attack_maps.mobility[chess.WHITE] + attack_maps.mobility[chess.BLACK]
 
     eval += mobility_bonus if board.turn == chess.WHITE else -mobility_bonus
-
-    stage = get_game_stage(board)
-
-    # Фазы игры
-    if stage == 'opening':
-        eval += evaluate_opening(board)
-    elif stage == 'middle game':
-        eval += evaluate_middle_game(board)
-    else:
-        eval += evaluate_endgame(board)
-
-    return eval
-
-def evaluate_opening(board):
+    yield eval
+
+    if state is None:
+        state = GameState(board)
+
+    # Фазы игры: плавный переход по материальной фазе
+    opening, middle_game, endgame = stage_weights(state.tapered_phase())
+    stage_eval = 0
+    if opening:
+        stage_eval += opening * evaluate_opening(board, attack_maps, state)
+    if middle_game:
+        stage_eval += middle_game * evaluate_middle_game(board)
+    if endgame:
+        stage_eval += endgame * evaluate_endgame(board)
+    eval += stage_eval / TOTAL_PHASE
+    yield eval
+
+def evaluate_opening(board, attack_maps=None, state=None):
     eval = 0
+    if attack_maps is None:
+        attack_maps = AttackMaps(board)
+    if state is None:
+        state = GameState(board)
 
     # Кешируем расположение фигур для ускорения
     piece_locations = {square: board.piece_at(square) for square in chess.SQUARES}
 
     # Штраф за повторные ходы одной и той же фигурой
-    piece_move_count = {}
-    repeated_moves_penalty = 0
-
-    # Флаг рокировки для каждого цвета
-    white_castled = board.has_castling_rights(chess.WHITE)
-    black_castled = board.has_castling_rights(chess.BLACK)
+    eval -= 60 * (state.repeated_moves[chess.WHITE] - state.repeated_moves[chess.BLACK])
 
     # Штраф за ходы королем до рокировки
-    king_moves_penalty = 0
-
-    # Проходим по последним ходам
-    for move in board.move_stack:
-        piece = piece_locations[move.from_square]
-
-        if piece:
-            # Увеличиваем счетчик ходов для каждой фигуры
-            piece_key = (piece.piece_type, piece.color)
-            if piece_key not in piece_move_count:
-                piece_move_count[piece_key] = 1
-            else:
-                piece_move_count[piece_key] += 1
-
-            # Если фигура ходила более одного раза, начисляем штраф
-            if piece_move_count[piece_key] > 1:
-                repeated_moves_penalty -= 60  # Уменьшаем оценку за каждый повторный ход
-
-            # Проверка на ходы королем
-            if piece.piece_type == chess.KING:
-                if piece.color == chess.WHITE and not white_castled:
-                    king_moves_penalty -= 30  # Штраф за ходы королем белых до рокировки
-                elif piece.color == chess.BLACK and not black_castled:
-                    king_moves_penalty -= 30  # Штраф за ходы королем черных до рокировки
-
-    eval += repeated_moves_penalty
-    eval += king_moves_penalty
+    eval -= 30 * (state.king_moves[chess.WHITE] - state.king_moves[chess.BLACK])
 
     # Вознаграждение за рокировку в безопасную сторону
-    if not white_castled:
-        if is_kingside_safe(board, chess.WHITE):
-            eval += 50  # Рокировка на королевский фланг
-        elif is_queenside_safe(board, chess.WHITE):
-            eval += 30  # Рокировка на ферзевый фланг
+    for color, sign in ((chess.WHITE, 1), (chess.BLACK, -1)):
+        if state.castled[color]:
+            continue
+        if is_kingside_safe(board, color, attack_maps):
+            eval += sign * 50  # Рокировка на королевский фланг
+        elif is_queenside_safe(board, color, attack_maps):
+            eval += sign * 30  # Рокировка на ферзевый фланг
         else:
-            eval -= 20  # Штраф за отсутствие рокировки
+            eval -= sign * 20  # Штраф за отсутствие рокировки
 
-    if not black_castled:
-        if is_kingside_safe(board, chess.BLACK):
-            eval += 50  # Рокировка на королевский фланг
-        elif is_queenside_safe(board, chess.BLACK):
-            eval += 30  # Рокировка на ферзевый фланг
-        else:
-            eval -= 20  # Штраф за отсутствие рокировки
-
-    # Применение штрафа за задержку рокировки
-    if len(board.move_stack) > 10:
-        if not white_castled:
-            eval -= 15  # Штраф за задержку рокировки белыми
-        if not black_castled:
-            eval -= 15  # Штраф за задержку рокировки черными
-
-    # Приоритеты развития фигур
-    piece_priority = {
-        chess.KNIGHT: 30,  # Очень высокий приоритет для коней
-        chess.BISHOP: 25,  # Высокий приоритет для слонов
-        chess.QUEEN: 10,   # Низкий приоритет для ферзя, чтобы не развивать его слишком рано
-        chess.ROOK: 5      # Минимальный приоритет для ладей, чтобы дать возможность рокировки
-    }
+        # Применение штрафа за задержку рокировки
+        if board.ply() > 10:
+            eval -= sign * 15
 
-    piece_priority_bonus = 0
-
-    # Проходим по последним ходам и начисляем бонусы за развитие фигур
-    for move in board.move_stack[-10:]:  # Расширяем диапазон до 10 ходов для большего влияния
-        piece = board.piece_at(move.from_square)  # Получаем фигуру, которая делала ход
-        if piece and piece.piece_type in piece_priority:
-            piece_priority_bonus += piece_priority[piece.piece_type] * 5 # Увеличиваем вес приоритета на 50%
-
-    # Добавляем к оценке бонус за развитие
-    eval += piece_priority_bonus
+    # Бонус за развитие фигур (первые ходы коней, слонов, ферзя и ладей)
+    eval += state.development[chess.WHITE] - state.development[chess.BLACK]
 
     # Контроль центра фигурами
     center_control_bonus = 0
@@ -201,9 +166,9 @@ def evaluate_opening(board):
                 pawn_position_bonus -= 40  # Штраф за центральные пешки черных
 
             # Поощрение за атаку центральных пешек соперника, чтобы они уходили в сторону
-            if piece.color == chess.BLACK and board.is_attacked_by(chess.WHITE, square):
+            if piece.color == chess.BLACK and attack_maps.is_attacked_by(chess.WHITE, square):
                 pawn_position_bonus += 20  # Поощрение за давление на центральные пешки черных
-            elif piece.color == chess.WHITE and board.is_attacked_by(chess.BLACK, square):
+            elif piece.color == chess.WHITE and attack_maps.is_attacked_by(chess.BLACK, square):
                 pawn_position_bonus -= 20  # Поощрение за давление на центральные пешки белых
 
     eval += pawn_position_bonus
@@ -220,15 +185,9 @@ def evaluate_middle_game(board):
             piece_coordination -= len(board.pieces(piece, chess.BLACK)) * 5
         eval += piece_coordination
 
-        # Pawn chain evaluation
-        pawn_chain_eval = 0
-        for file in range(8):
-            pawn_chain = 0
-            for rank in range(8):
-                if board.piece_at(file * 8 + rank) and board.piece_at(file * 8 + rank).piece_type == chess.PAWN:
-                    pawn_chain += 1
-            pawn_chain_eval += pawn_chain * 10
-        eval += pawn_chain_eval
+        # Pawn chain evaluation (пешки, защищенные своей пешкой, из пешечного кэша)
+        pawn_entry = pawn_hash.probe(board)
+        eval += (pawn_entry.chains[chess.WHITE] - pawn_entry.chains[chess.BLACK]) * 10
 
         # Open lines and files
         open_lines = 0
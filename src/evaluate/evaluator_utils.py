@@ -1,4 +1,6 @@
 import chess
+from evaluate.attack_maps import AttackMaps
+from evaluate.game_state import PHASE_WEIGHTS, TOTAL_PHASE
 
 def control_of_open_lines(board, piece_type, color):
         """Возвращает оценку контроля открытых линий (для ладей)."""
@@ -10,42 +12,38 @@ def control_of_open_lines(board, piece_type, color):
                     open_lines += 1
         return open_lines
 
-def evaluate_piece_safety(board):
+def evaluate_piece_safety(board, attack_maps=None):
         """Оценка защищенности фигур: штраф за незащищенные фигуры, которые могут быть атакованы"""
+        if attack_maps is None:
+            attack_maps = AttackMaps(board)
         safety_eval = 0
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece:
-                if piece.color == chess.WHITE:
-                    if not board.is_attacked_by(chess.WHITE, square) and board.is_attacked_by(chess.BLACK, square):
-                        safety_eval -= 50  # Белая фигура атакована, но не защищена
-                else:
-                    if not board.is_attacked_by(chess.BLACK, square) and board.is_attacked_by(chess.WHITE, square):
-                        safety_eval += 50  # Черная фигура атакована, но не защищена
+        safety_eval -= 50 * chess.popcount(attack_maps.hanging(chess.WHITE))  # Белые фигуры атакованы, но не защищены
+        safety_eval += 50 * chess.popcount(attack_maps.hanging(chess.BLACK))  # Черные фигуры атакованы, но не защищены
         return safety_eval
 
-def is_kingside_safe(board, color):
+def is_kingside_safe(board, color, attack_maps=None):
         # Пример проверки безопасности рокировки на королевский фланг
+        if attack_maps is None:
+            attack_maps = AttackMaps(board)
         if color == chess.WHITE:
-            return not board.is_attacked_by(chess.BLACK, chess.F1) and not board.is_attacked_by(chess.BLACK, chess.G1)
+            return not attack_maps.attacks[chess.BLACK] & (chess.BB_F1 | chess.BB_G1)
         else:
-            return not board.is_attacked_by(chess.WHITE, chess.F8) and not board.is_attacked_by(chess.WHITE, chess.G8)
+            return not attack_maps.attacks[chess.WHITE] & (chess.BB_F8 | chess.BB_G8)
 
-def is_queenside_safe(board, color):
+def is_queenside_safe(board, color, attack_maps=None):
         # Пример проверки безопасности рокировки на ферзевый фланг
+        if attack_maps is None:
+            attack_maps = AttackMaps(board)
         if color == chess.WHITE:
-            return not board.is_attacked_by(chess.BLACK, chess.C1) and not board.is_attacked_by(chess.BLACK, chess.D1)
+            return not attack_maps.attacks[chess.BLACK] & (chess.BB_C1 | chess.BB_D1)
         else:
-            return not board.is_attacked_by(chess.WHITE, chess.C8) and not board.is_attacked_by(chess.WHITE, chess.D8)
+            return not attack_maps.attacks[chess.WHITE] & (chess.BB_C8 | chess.BB_D8)
 
-def spatial_advantage(board, color):
+def spatial_advantage(board, color, attack_maps=None):
         """Оценка пространственного преимущества (число полей, контролируемых фигурами указанного цвета)."""
-        control = 0
-        for square in chess.SQUARES:
-            attackers = board.attackers(color, square)
-            if len(attackers) > 0:
-                control += 1
-        return control
+        if attack_maps is None:
+            attack_maps = AttackMaps(board)
+        return attack_maps.space(color)
 
 def center_control(board, color):
     eval = 0
@@ -59,11 +57,26 @@ def center_control(board, color):
                 eval -= 20
     return eval
 
-def get_game_stage(board):
+def material_phase(board):
+    """Фаза партии по материалу: TOTAL_PHASE в начале, 0 когда остались короли и пешки."""
+    phase = sum(PHASE_WEIGHTS[piece_type] * chess.popcount(board.pieces_mask(piece_type, chess.WHITE) |
+                                                          board.pieces_mask(piece_type, chess.BLACK))
+                for piece_type in chess.PIECE_TYPES)
+    return min(phase, TOTAL_PHASE)
+
+def stage_weights(phase):
+    """Веса дебюта, миттельшпиля и эндшпиля для плавного перехода между стадиями (в сумме TOTAL_PHASE)."""
+    half = TOTAL_PHASE // 2
+    opening = max(0, phase - half) * 2
+    endgame = max(0, half - phase) * 2
+    return opening, TOTAL_PHASE - opening - endgame, endgame
 
-    if len(board.move_stack) < 15:  # Opening
+def get_game_stage(board, state=None):
+    """Преобладающая стадия партии по материальной фазе."""
+    opening, middle_game, endgame = stage_weights(state.tapered_phase() if state is not None else material_phase(board))
+    if opening >= middle_game:  # Opening
         return 'opening'
-    elif len(board.move_stack) < 30:  # Middle game
+    elif middle_game >= endgame:  # Middle game
         return 'middle game'
     else:  # Endgame
-        return 'endgame'
\ No newline at end of file
+        return 'endgame'
@@ -0,0 +1,124 @@
+import chess
+
+# Вклад фигур в фазу партии: 24 - полный материал (начало партии), 0 - только короли и пешки
+PHASE_WEIGHTS = {
+    chess.PAWN: 0,
+    chess.KNIGHT: 1,
+    chess.BISHOP: 1,
+    chess.ROOK: 2,
+    chess.QUEEN: 4,
+    chess.KING: 0
+}
+TOTAL_PHASE = 24
+
+# Бонус за первый ход фигуры (развитие)
+DEVELOPMENT_BONUS = {
+    chess.KNIGHT: 150,  # Очень высокий приоритет для коней
+    chess.BISHOP: 125,  # Высокий приоритет для слонов
+    chess.QUEEN: 50,    # Низкий приоритет для ферзя, чтобы не развивать его слишком рано
+    chess.ROOK: 25      # Минимальный приоритет для ладей, чтобы дать возможность рокировки
+}
+
+
+class GameState:
+    """Учет хода партии для оценки дебюта: число ходов каждой фигуры, рокировка, ходы короля,
+    развитие и материальная фаза. Обновляется на push/pop вместо прохода по board.move_stack.
+
+    Фигура опознается по полю, на котором она стояла в начальной позиции (piece_ids[поле]).
+    Списки по цвету индексируются цветом (0 - черные, 1 - белые).
+    """
+
+    def __init__(self, board=None):
+        if board is None:
+            board = chess.Board()
+        self.reset(board)
+
+    def reset(self, board):
+        """Пересчитывает состояние, один раз проигрывая ходы партии от начальной позиции."""
+        root = board.root()
+        self.piece_ids = [square if root.piece_type_at(square) else None for square in chess.SQUARES]
+        self.move_counts = [0] * 64           # По номеру фигуры
+        self.repeated_moves = [0, 0]          # Повторные ходы одной и той же фигурой
+        self.king_moves = [0, 0]              # Ходы королем до рокировки
+        self.castled = [False, False]
+        self.development = [0, 0]             # Сумма DEVELOPMENT_BONUS за вышедшие фигуры
+        self.phase = sum(PHASE_WEIGHTS[piece.piece_type] for piece in root.piece_map().values())
+        self.stack = []
+        for move in board.move_stack:
+            self.push(root, move)
+            root.push(move)
+
+    def tapered_phase(self):
+        """Фаза от 0 (эндшпиль) до TOTAL_PHASE (дебют); при превращениях ограничена сверху."""
+        return min(self.phase, TOTAL_PHASE)
+
+    def push(self, board, move):
+        """Обновляет состояние для хода; вызывается до board.push(move)."""
+        snapshot = (tuple(self.repeated_moves), tuple(self.king_moves), tuple(self.castled),
+                    tuple(self.development), self.phase)
+        changes = []
+        moved_id = None
+        self.stack.append((snapshot, changes, None))
+        if not move:
+            return
+
+        ids = self.piece_ids
+        color = board.turn
+        from_square = move.from_square
+        to_square = move.to_square
+        piece_type = board.piece_type_at(from_square)
+        moved_id = ids[from_square]
+
+        if board.is_castling(move):
+            rank = chess.square_rank(from_square)
+            if board.color_at(to_square) == color:
+                rook_square = to_square
+            else:
+                rook_square = chess.square(7 if to_square > from_square else 0, rank)
+            kingside = rook_square > from_square
+            rook_id = ids[rook_square]
+            king_target = chess.square(6 if kingside else 2, rank)
+            rook_target = chess.square(5 if kingside else 3, rank)
+            for square in (from_square, rook_square, king_target, rook_target):
+                changes.append((square, ids[square]))
+            ids[from_square] = ids[rook_square] = None
+            ids[king_target] = moved_id
+            ids[rook_target] = rook_id
+            self.castled[color] = True
+        else:
+            changes.append((from_square, moved_id))
+            changes.append((to_square, ids[to_square]))
+            captured_type = board.piece_type_at(to_square)
+            if captured_type is not None:
+                self.phase -= PHASE_WEIGHTS[captured_type]
+            elif piece_type == chess.PAWN and to_square == board.ep_square:
+                captured_square = to_square - 8 if color == chess.WHITE else to_square + 8
+                changes.append((captured_square, ids[captured_square]))
+                ids[captured_square] = None
+            if move.promotion:
+                self.phase += PHASE_WEIGHTS[move.promotion]
+            ids[from_square] = None
+            ids[to_square] = moved_id
+            if piece_type == chess.KING and not self.castled[color]:
+                self.king_moves[color] += 1
+
+        if moved_id is not None:
+            if self.move_counts[moved_id]:
+                self.repeated_moves[color] += 1
+            elif piece_type in DEVELOPMENT_BONUS:
+                self.development[color] += DEVELOPMENT_BONUS[piece_type]
+            self.move_counts[moved_id] += 1
+        self.stack[-1] = (snapshot, changes, moved_id)
+
+    def pop(self):
+        """Восстанавливает состояние после board.pop()."""
+        snapshot, changes, moved_id = self.stack.pop()
+        for square, piece_id in reversed(changes):
+            self.piece_ids[square] = piece_id
+        if moved_id is not None:
+            self.move_counts[moved_id] -= 1
+        repeated_moves, king_moves, castled, development, self.phase = snapshot
+        self.repeated_moves = list(repeated_moves)
+        self.king_moves = list(king_moves)
+        self.castled = list(castled)
+        self.development = list(development)
@@ -0,0 +1,62 @@
+import json
+import os
+
+from evaluate.weights import WEIGHTS, weights_hash
+
+MARGINS_PATH = os.path.join(os.path.dirname(__file__), 'lazy_margins.json')
+
+
+def read_margins(path=MARGINS_PATH):
+    """Все запасы из файла, если они посчитаны для текущих весов оценки (иначе пустой словарь)."""
+    try:
+        with open(path, encoding='utf-8') as margins_file:
+            margins = json.load(margins_file)
+    except FileNotFoundError:
+        return {}
+    if margins.pop('weights', None) != weights_hash(WEIGHTS):
+        return {}  # Веса изменились (tune.py): старые запасы могут быть меньше вклада стадий
+    return margins
+
+
+def load_margins(name, path=MARGINS_PATH):
+    """Запасы ленивой оценки оценщика name из файла build_lazy_margins.py; None - оценка всегда полная."""
+    margins = read_margins(path).get(name)
+    return tuple(margins) if margins else None
+
+
+class LazyStats:
+    """Сколько оценок закончилось досрочно после каждой стадии."""
+
+    def __init__(self, stages):
+        self.stages = tuple(stages)
+        self.reset()
+
+    def reset(self):
+        self.evaluations = 0
+        self.skips = [0] * len(self.stages)
+
+    def skip_rate(self):
+        return sum(self.skips) / self.evaluations if self.evaluations else 0.0
+
+    def to_dict(self):
+        return {'evaluations': self.evaluations, 'skip_rate': self.skip_rate(),
+                'skips': dict(zip(self.stages, self.skips))}
+
+
+def lazy_evaluate(scores, margins, alpha, beta, stats=None):
+    """Ленивая оценка по накопленным оценкам стадий scores (от дешевых признаков к дорогим).
+
+    margins[i] - наибольший вклад всех стадий после i. Если оценка после стадии i вместе
+    с запасом не возвращается в окно [alpha, beta], остальные стадии не считаются, а
+    возвращается граница: не ниже настоящей оценки при провале вниз, не выше - при провале вверх.
+    """
+    if stats is not None:
+        stats.evaluations += 1
+    for stage, score in enumerate(scores):
+        if stage < len(margins):
+            margin = margins[stage]
+            if score + margin <= alpha or score - margin >= beta:
+                if stats is not None:
+                    stats.skips[stage] += 1
+                return score + margin if score + margin <= alpha else score - margin
+    return score
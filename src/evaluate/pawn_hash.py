@@ -0,0 +1,119 @@
+import chess
+
+from evaluate.weights import WEIGHTS
+
+PAWN_ISLAND_PENALTY = WEIGHTS['pawn_island']
+ISOLATED_PAWN_PENALTY = WEIGHTS['isolated_pawn']
+DOUBLED_PAWN_PENALTY = WEIGHTS['doubled_pawn']
+PASSED_PAWN_BONUS = tuple(WEIGHTS['passed_pawn'])  # По горизонтали, считая от своей стороны
+
+# Соседние вертикали для каждой вертикали
+ADJACENT_FILES = [(chess.BB_FILES[file - 1] if file > 0 else 0) | (chess.BB_FILES[file + 1] if file < 7 else 0)
+                  for file in range(8)]
+
+
+def _passed_pawn_mask(color, square):
+    """Поля перед пешкой на своей и соседних вертикалях: без пешек соперника там пешка проходная."""
+    file, rank = chess.square_file(square), chess.square_rank(square)
+    files = chess.BB_FILES[file] | ADJACENT_FILES[file]
+    ahead = range(rank + 1, 8) if color == chess.WHITE else range(rank)
+    mask = 0
+    for ahead_rank in ahead:
+        mask |= chess.BB_RANKS[ahead_rank]
+    return files & mask
+
+
+# PASSED_PAWN_MASKS[цвет][поле]
+PASSED_PAWN_MASKS = ([_passed_pawn_mask(chess.BLACK, square) for square in chess.SQUARES],
+                     [_passed_pawn_mask(chess.WHITE, square) for square in chess.SQUARES])
+
+
+def pawn_attacks(pawns, color):
+    """Битборд полей, которые бьют пешки цвета color."""
+    if color == chess.WHITE:
+        return (((pawns & ~chess.BB_FILE_A) << 7) | ((pawns & ~chess.BB_FILE_H) << 9)) & chess.BB_ALL
+    return ((pawns & ~chess.BB_FILE_A) >> 9) | ((pawns & ~chess.BB_FILE_H) >> 7)
+
+
+class PawnEntry:
+    """Все пешечные термы позиции; списки индексируются цветом (0 - черные, 1 - белые)."""
+
+    __slots__ = ('islands', 'isolated', 'doubled', 'passed', 'chains', 'score')
+
+    def __init__(self, white_pawns, black_pawns):
+        pawns = (black_pawns, white_pawns)
+        self.islands = [0, 0]
+        self.isolated = [0, 0]
+        self.doubled = [0, 0]
+        self.passed = [0, 0]   # Битборды проходных пешек
+        self.chains = [0, 0]   # Пешки, защищенные своей пешкой
+        for color in chess.COLORS:
+            own, enemy = pawns[color], pawns[not color]
+            files = 0
+            for file in range(8):
+                on_file = own & chess.BB_FILES[file]
+                if not on_file:
+                    continue
+                files |= 1 << file
+                count = chess.popcount(on_file)
+                if count > 1:
+                    self.doubled[color] += 1
+                if not own & ADJACENT_FILES[file]:
+                    self.isolated[color] += count
+            self.islands[color] = chess.popcount(files & ~(files << 1))
+            self.chains[color] = chess.popcount(own & pawn_attacks(own, color))
+            masks = PASSED_PAWN_MASKS[color]
+            for square in chess.scan_forward(own):
+                if not enemy & masks[square]:
+                    self.passed[color] |= chess.BB_SQUARES[square]
+
+        score = 0
+        for color, sign in ((chess.WHITE, 1), (chess.BLACK, -1)):
+            score -= sign * (PAWN_ISLAND_PENALTY * self.islands[color] +
+                             ISOLATED_PAWN_PENALTY * self.isolated[color] +
+                             DOUBLED_PAWN_PENALTY * self.doubled[color])
+            for square in chess.scan_forward(self.passed[color]):
+                rank = chess.square_rank(square)
+                score += sign * PASSED_PAWN_BONUS[rank if color == chess.WHITE else 7 - rank]
+        self.score = score  # За белых
+
+
+class PawnHashTable:
+    """Кэш пешечной структуры фиксированного размера с ключом по двум пешечным битбордам.
+
+    Пешки двигаются редко, поэтому почти все листья попадают в уже посчитанную запись.
+    Таблица прямого отображения: новая запись вытесняет старую из того же слота.
+    """
+
+    def __init__(self, size=1 << 14):
+        if size & (size - 1):
+            raise ValueError("Pawn hash size must be a power of two")
+        self.mask = size - 1
+        self.slots = [None] * size
+        self.reset_stats()
+
+    def clear(self):
+        self.slots = [None] * len(self.slots)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, board):
+        """Запись для пешек позиции; при промахе считается и сохраняется."""
+        white_pawns = board.pawns & board.occupied_co[chess.WHITE]
+        black_pawns = board.pawns & board.occupied_co[chess.BLACK]
+        index = hash((white_pawns, black_pawns)) & self.mask
+        slot = self.slots[index]
+        if slot is not None and slot[0] == white_pawns and slot[1] == black_pawns:
+            self.hits += 1
+            return slot[2]
+        self.misses += 1
+        entry = PawnEntry(white_pawns, black_pawns)
+        self.slots[index] = (white_pawns, black_pawns, entry)
+        return entry
+
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
@@ -0,0 +1,165 @@
+import functools
+import inspect
+import sys
+import time
+from collections import defaultdict
+
+from evaluate import attack_maps, backends, evaluator, evaluator_utils, lazy, pawn_hash
+
+# Модули, функции которых считаются термами оценки (в том числе импортированные в другие модули)
+MODULES = (evaluator, evaluator_utils, backends, lazy)
+# Вспомогательные классы: их методы возвращают битборды и счетчики, а не оценки
+CLASSES = (attack_maps.AttackMaps, pawn_hash.PawnEntry, pawn_hash.PawnHashTable)
+
+
+class TermStats:
+    __slots__ = ('calls', 'total', 'own', 'score', 'magnitude')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0      # Время вместе с вложенными термами
+        self.own = 0.0        # Собственное время
+        self.score = 0.0      # Сумма возвращенных оценок
+        self.magnitude = 0.0  # Сумма их модулей
+
+
+class EvalProfiler:
+    """Профиль термов оценки: число вызовов, время (полное и собственное) и вклад в оценку.
+
+    enable() подменяет функции и методы пакета evaluate обертками, disable() возвращает
+    исходные - выключенный профилировщик ничего не стоит. Вкладом считается возвращенное
+    термом число (для признаков вроде spatial_advantage - до умножения на вес).
+    Дополнительные методы (например, ChessBot.evaluate_board) передаются в extra как (класс, имя).
+    """
+
+    def __init__(self, extra=()):
+        self.extra = tuple(extra)
+        self.terms = defaultdict(TermStats)
+        self.stacks = defaultdict(float)  # "терм;вложенный терм" -> собственное время
+        self.frames = []                  # [имя, начало, время вложенных]
+        self.patches = []
+
+    def enable(self):
+        if self.patches:
+            return
+        wrappers = {}
+        for module in MODULES:
+            for attribute, value in list(vars(module).items()):
+                if inspect.isfunction(value) and value.__module__.startswith('evaluate.') and \
+                        value.__module__ != __name__:
+                    if value not in wrappers:
+                        wrappers[value] = self.wrap(value.__name__, value)
+                    self.patch(module, attribute, wrappers[value])
+        for owner in CLASSES + tuple(backends.EVALUATORS.values()):
+            for attribute, value in list(vars(owner).items()):
+                if inspect.isfunction(value) and (attribute == '__init__' or not attribute.startswith('_')):
+                    name = owner.__name__ if attribute == '__init__' else f"{owner.__name__}.{attribute}"
+                    self.patch(owner, attribute, self.wrap(name, value, scored=owner not in CLASSES))
+        for owner, attribute in self.extra:
+            value = vars(owner)[attribute]
+            self.patch(owner, attribute, self.wrap(f"{owner.__name__}.{attribute}", value))
+
+    def disable(self):
+        while self.patches:
+            owner, attribute, original = self.patches.pop()
+            setattr(owner, attribute, original)
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.disable()
+
+    def reset(self):
+        self.terms.clear()
+        self.stacks.clear()
+
+    def patch(self, owner, attribute, replacement):
+        self.patches.append((owner, attribute, vars(owner)[attribute]))
+        setattr(owner, attribute, replacement)
+
+    def enter(self, name):
+        self.frames.append([name, time.perf_counter(), 0.0])
+
+    def leave(self, result=None):
+        name, start, children = self.frames.pop()
+        elapsed = time.perf_counter() - start
+        stats = self.terms[name]
+        stats.calls += 1
+        stats.total += elapsed
+        stats.own += elapsed - children
+        if isinstance(result, (int, float)) and not isinstance(result, bool):
+            stats.score += result
+            stats.magnitude += abs(result)
+        self.stacks[";".join(frame[0] for frame in self.frames) + (";" if self.frames else "") + name] += \
+            elapsed - children
+        if self.frames:
+            self.frames[-1][2] += elapsed
+
+    def wrap(self, name, function, scored=True):
+        """Обертка терма; scored - возвращаемое значение является оценкой.
+
+        Генераторы стадий ленивой оценки профилируются по шагам: каждая стадия - отдельный
+        терм "имя:стадия" с вкладом, равным приросту накопленной оценки.
+        """
+        profiler = self
+
+        if inspect.isgeneratorfunction(function):
+            module_stages = getattr(sys.modules[function.__module__], 'STAGES', ())
+
+            @functools.wraps(function)
+            def generator_wrapper(*args, **kwargs):
+                stages = getattr(args[0], 'stages', None) if args else None
+                stages = stages or module_stages
+                generator = function(*args, **kwargs)
+                previous = 0
+                for index in range(sys.maxsize):
+                    profiler.enter(f"{name}:{stages[index] if index < len(stages) else index}")
+                    try:
+                        value = next(generator)
+                    except StopIteration:
+                        profiler.frames.pop()  # Пустой шаг после последней стадии не считается
+                        return
+                    except BaseException:
+                        profiler.leave()
+                        raise
+                    profiler.leave(value - previous)
+                    previous = value
+                    yield value
+            return generator_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profiler.enter(name)
+            result = None
+            try:
+                result = function(*args, **kwargs)
+                return result
+            finally:
+                profiler.leave(result if scored else None)
+        return wrapper
+
+    def flat(self):
+        """Строки плоского профиля по убыванию собственного времени."""
+        total = sum(stats.own for stats in self.terms.values()) or 1.0
+        rows = []
+        for name, stats in self.terms.items():
+            rows.append({'term': name, 'calls': stats.calls, 'total': stats.total, 'own': stats.own,
+                         'own_share': stats.own / total, 'per_call_us': stats.total / stats.calls * 1e6,
+                         'mean_score': stats.score / stats.calls, 'mean_abs_score': stats.magnitude / stats.calls})
+        return sorted(rows, key=lambda row: row['own'], reverse=True)
+
+    def format_flat(self):
+        lines = [f"{'term':40s} {'calls':>9s} {'total ms':>10s} {'own ms':>10s} {'own %':>6s} "
+                 f"{'us/call':>8s} {'mean':>8s} {'mean |x|':>9s}"]
+        for row in self.flat():
+            lines.append(f"{row['term']:40s} {row['calls']:9d} {row['total'] * 1000:10.1f} {row['own'] * 1000:10.1f} "
+                         f"{row['own_share'] * 100:6.1f} {row['per_call_us']:8.1f} {row['mean_score']:8.1f} "
+                         f"{row['mean_abs_score']:9.1f}")
+        return "\n".join(lines)
+
+    def collapsed(self):
+        """Свернутые стеки для flamegraph.pl/speedscope: "терм;вложенный терм мкс"."""
+        return "\n".join(f"{stack} {int(round(seconds * 1e6))}" for stack, seconds in sorted(self.stacks.items())
+                         if seconds > 0)
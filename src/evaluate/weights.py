@@ -0,0 +1,31 @@
+import hashlib
+import json
+import os
+
+WEIGHTS_PATH = os.path.join(os.path.dirname(__file__), 'weights.json')
+
+# Веса классической оценки, если файла весов нет (penalty - штрафы, вычитаются из оценки)
+DEFAULT_WEIGHTS = {
+    'pawn_island': 20,
+    'isolated_pawn': 15,
+    'doubled_pawn': 10,
+    'passed_pawn': [0, 5, 10, 20, 35, 60, 100, 0],  # По горизонтали, считая от своей стороны
+    'space': 15,
+}
+
+
+def load_weights(path=WEIGHTS_PATH):
+    """Веса из файла tune.py поверх значений по умолчанию; читаются один раз при импорте оценки."""
+    weights = dict(DEFAULT_WEIGHTS)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as weights_file:
+            weights.update(json.load(weights_file))
+    return weights
+
+
+def weights_hash(weights):
+    """Отпечаток весов: запасы ленивой оценки действительны только для весов, с которыми посчитаны."""
+    return hashlib.sha1(json.dumps(weights, sort_keys=True).encode()).hexdigest()[:16]
+
+
+WEIGHTS = load_weights()
@@ -0,0 +1,246 @@
+import argparse
+import json
+import math
+import multiprocessing
+import time
+
+import chess
+import chess.pgn
+
+from chessbot import ChessBot
+
+MAX_PLIES = 400  # Дальше партия признается ничьей
+
+
+def parse_engine(spec):
+    """Конфигурация движка из строки "depth=3,evaluator=fast,selective=true": аргументы ChessBot."""
+    config = {}
+    for item in filter(None, spec.split(',')):
+        name, _, value = item.partition('=')
+        if value.lower() in ('true', 'false'):
+            value = value.lower() == 'true'
+        else:
+            for convert in (int, float):
+                try:
+                    value = convert(value)
+                    break
+                except ValueError:
+                    pass
+        config[name.strip()] = value
+    return config
+
+
+def load_openings(path, plies=8):
+    """Дебюты (FEN начальной позиции, ходы UCI) из EPD или PGN; из PGN берутся первые plies полуходов."""
+    openings = []
+    if path.lower().endswith('.pgn'):
+        with open(path, encoding='utf-8', errors='replace') as pgn:
+            while True:
+                game = chess.pgn.read_game(pgn)
+                if game is None:
+                    break
+                moves = [move.uci() for move in list(game.mainline_moves())[:plies]]
+                openings.append((game.board().fen(), moves))
+    else:
+        with open(path, encoding='utf-8') as epd:
+            for line in epd:
+                if line.strip():
+                    board, _ = chess.Board.from_epd(line.strip())
+                    openings.append((board.fen(), []))
+    return openings
+
+
+def schedule(openings, games):
+    """Задания на партии: каждый дебют играется парой с обменом цветами."""
+    tasks = []
+    for index in range(games):
+        fen, moves = openings[(index // 2) % len(openings)]
+        tasks.append((index, fen, moves, index % 2 == 1))  # Нечетные партии - второй движок за белых
+    return tasks
+
+
+# Боты процесса-исполнителя, создаются один раз на процесс
+_bots = None
+_limits = None
+
+
+def _init_worker(configs, limits):
+    global _bots, _limits
+    _bots = [ChessBot(**config) for config in configs]
+    _limits = limits
+
+
+def _play_game(task):
+    """Играет одну партию; возвращает результат с точки зрения первого движка и PGN."""
+    index, fen, moves, swapped = task
+    max_time, max_nodes = _limits
+    board = chess.Board(fen)
+    for uci_move in moves:
+        board.push_uci(uci_move)
+    white, black = (_bots[1], _bots[0]) if swapped else (_bots[0], _bots[1])
+    white.new_game()
+    black.new_game()
+
+    termination = None
+    while True:
+        outcome = board.outcome(claim_draw=True)
+        if outcome is not None:
+            result = outcome.result()
+            termination = outcome.termination.name.lower()
+            break
+        if board.ply() >= MAX_PLIES:
+            result, termination = '1/2-1/2', 'max_plies'
+            break
+        bot = white if board.turn == chess.WHITE else black
+        move = bot.find_best_move(board, max_time, max_nodes)
+        if move is None or not board.is_legal(move):
+            result = '0-1' if board.turn == chess.WHITE else '1-0'
+            termination = 'illegal_move'
+            break
+        board.push(move)
+
+    points = {'1-0': 1.0, '0-1': 0.0, '1/2-1/2': 0.5}[result]
+    score = 1.0 - points if swapped else points
+    return {'game': index, 'swapped': swapped, 'result': result, 'score': score,
+            'termination': termination, 'plies': board.ply(), 'opening': fen,
+            'pgn_moves': [move.uci() for move in board.move_stack]}
+
+
+def elo_from_score(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_estimate(wins, draws, losses):
+    """Разница Эло и половина 95% доверительного интервала."""
+    games = wins + draws + losses
+    if not games:
+        return 0.0, float('inf')
+    score = (wins + 0.5 * draws) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    margin = 1.96 * math.sqrt(variance / games)
+    low, high = elo_from_score(score - margin), elo_from_score(score + margin)
+    return elo_from_score(score), (high - low) / 2
+
+
+def sprt_llr(wins, draws, losses, elo0, elo1):
+    """Логарифм отношения правдоподобия GSPRT (нормальное приближение) для гипотез elo0 и elo1."""
+    games = wins + draws + losses
+    if not games or not wins + losses:
+        return 0.0
+    score = (wins + 0.5 * draws) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    if variance <= 0:
+        return 0.0
+    score0 = 1 / (1 + 10 ** (-elo0 / 400))
+    score1 = 1 / (1 + 10 ** (-elo1 / 400))
+    return games * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+
+
+def sprt_bounds(alpha, beta):
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def write_pgn(stream, record, names, round_number):
+    """Дописывает партию в PGN-поток."""
+    board = chess.Board(record['opening'])
+    for uci_move in record['pgn_moves']:
+        board.push_uci(uci_move)
+    game = chess.pgn.Game.from_board(board)
+    white, black = (names[1], names[0]) if record['swapped'] else (names[0], names[1])
+    game.headers['Event'] = 'Match'
+    game.headers['Round'] = str(round_number)
+    game.headers['White'] = white
+    game.headers['Black'] = black
+    game.headers['Result'] = record['result']
+    game.headers['Termination'] = record['termination']
+    stream.write(str(game) + "\n\n")
+    stream.flush()
+
+
+def run_match(configs, names, openings, games, concurrency, max_time=None, max_nodes=None,
+              pgn_path=None, results_path=None, sprt=None, report_every=10):
+    """Играет матч в пуле процессов; sprt=(elo0, elo1, alpha, beta) включает досрочную остановку.
+
+    Возвращает (победы, ничьи, поражения) первого движка и решение SPRT ('H0', 'H1' или None).
+    """
+    tasks = schedule(openings, games)
+    wins = draws = losses = 0
+    decision = None
+    bounds = sprt_bounds(sprt[2], sprt[3]) if sprt else None
+    # Файлы перезаписываются: партии и результаты разных матчей не смешиваются
+    pgn = open(pgn_path, 'w', encoding='utf-8') if pgn_path else None
+    results = open(results_path, 'w', encoding='utf-8') if results_path else None
+    start = time.monotonic()
+    pool = multiprocessing.Pool(concurrency, initializer=_init_worker, initargs=(configs, (max_time, max_nodes)))
+    try:
+        for played, record in enumerate(pool.imap_unordered(_play_game, tasks), 1):
+            if record['score'] == 1.0:
+                wins += 1
+            elif record['score'] == 0.0:
+                losses += 1
+            else:
+                draws += 1
+            if pgn:
+                write_pgn(pgn, record, names, record['game'] + 1)
+            if results:
+                summary = {key: value for key, value in record.items() if key != 'pgn_moves'}
+                results.write(json.dumps(summary) + "\n")
+                results.flush()
+
+            llr = None
+            if sprt:
+                llr = sprt_llr(wins, draws, losses, sprt[0], sprt[1])
+                if llr <= bounds[0]:
+                    decision = 'H0'
+                elif llr >= bounds[1]:
+                    decision = 'H1'
+            if played % report_every == 0 or played == len(tasks) or decision:
+                elo, margin = elo_estimate(wins, draws, losses)
+                line = (f"Games {played}: +{wins} ={draws} -{losses}  Elo {elo:+.1f} +/- {margin:.1f}  "
+                        f"({time.monotonic() - start:.0f}s)")
+                if llr is not None:
+                    line += f"  LLR {llr:.2f} [{bounds[0]:.2f}, {bounds[1]:.2f}]"
+                print(line, flush=True)
+            if decision:
+                break
+    finally:
+        pool.terminate()
+        pool.join()
+        if pgn:
+            pgn.close()
+        if results:
+            results.close()
+    return (wins, draws, losses), decision
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Матч двух конфигураций ChessBot в пуле процессов")
+    parser.add_argument("--engine1", default="depth=3", help='Аргументы ChessBot, например "depth=3,evaluator=fast"')
+    parser.add_argument("--engine2", default="depth=3")
+    parser.add_argument("--name1", default=None)
+    parser.add_argument("--name2", default=None)
+    parser.add_argument("--openings", default=None, help="EPD или PGN с дебютами (по умолчанию начальная позиция)")
+    parser.add_argument("--opening-plies", type=int, default=8, help="Сколько полуходов брать из партий PGN")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--time", type=float, default=None, help="Секунд на ход")
+    parser.add_argument("--nodes", type=int, default=None, help="Лимит узлов на ход")
+    parser.add_argument("--pgn", default="match.pgn")
+    parser.add_argument("--results", default="match.jsonl", help="Результаты партий по одной JSON-строке")
+    parser.add_argument("--sprt", nargs=2, type=float, metavar=("ELO0", "ELO1"), default=None,
+                        help="Досрочная остановка по SPRT между гипотезами ELO0 и ELO1")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    args = parser.parse_args()
+
+    configs = [parse_engine(args.engine1), parse_engine(args.engine2)]
+    names = [args.name1 or args.engine1, args.name2 or args.engine2]
+    openings = load_openings(args.openings, args.opening_plies) if args.openings else [(chess.STARTING_FEN, [])]
+    sprt = (args.sprt[0], args.sprt[1], args.alpha, args.beta) if args.sprt else None
+    (wins, draws, losses), decision = run_match(configs, names, openings, args.games, max(1, args.concurrency),
+                                                args.time, args.nodes, args.pgn, args.results, sprt)
+    elo, margin = elo_estimate(wins, draws, losses)
+    print(f"Result: {names[0]} vs {names[1]}: +{wins} ={draws} -{losses}, Elo {elo:+.1f} +/- {margin:.1f}")
+    if decision:
+        print(f"SPRT: {decision} accepted")
@@ -0,0 +1,119 @@
+from array import array
+
+import chess
+
+from see import mvv_lva
+from transposition import encode_move
+
+MAX_PLY = 128
+HISTORY_MAX = 1 << 20  # При превышении вся таблица истории делится пополам
+
+# Приоритеты групп ходов
+TT_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+KILLER_SCORES = (1 << 27, (1 << 27) - 1)
+COUNTER_MOVE_SCORE = 1 << 26
+
+
+class MoveOrdering:
+    """Сортировка ходов: ход из таблицы транспозиций, взятия по MVV-LVA, "убийственные" ходы,
+    ответные ходы и таблица истории. Все таблицы - массивы фиксированного размера."""
+
+    def __init__(self):
+        self.killers = array('H', [0]) * (2 * MAX_PLY)       # Два слота на каждый ply
+        self.history = array('l', [0]) * (2 * 64 * 64)       # [цвет][откуда][куда]
+        self.counter_moves = array('H', [0]) * (64 * 64)     # [откуда][куда] предыдущего хода
+        self.reset_stats()
+
+    def clear(self):
+        """Очищает все таблицы (новая партия)."""
+        self.__init__()
+
+    def state(self):
+        """Таблицы в виде байтов - для хранения вне бота (сессия партии на сервере)."""
+        return self.killers.tobytes(), self.history.tobytes(), self.counter_moves.tobytes()
+
+    def load_state(self, state):
+        """Восстанавливает таблицы из state(); None - пустые таблицы."""
+        self.clear()
+        if state is not None:
+            killers, history, counter_moves = state
+            self.killers = array('H', killers)
+            self.history = array('l', history)
+            self.counter_moves = array('H', counter_moves)
+
+    def reset_stats(self):
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.cutoff_index_total = 0
+
+    def new_search(self):
+        """Старение: история прошлых поисков делится пополам, "убийственные" ходы сбрасываются."""
+        history = self.history
+        for index in range(len(history)):
+            history[index] >>= 1
+        self.killers = array('H', [0]) * len(self.killers)
+        self.reset_stats()
+
+    def order(self, board, moves, ply, tt_move=None):
+        """Возвращает ходы, отсортированные по убыванию приоритета."""
+        tt_code = encode_move(tt_move)
+        killer_index = 2 * min(ply, MAX_PLY - 1)
+        killer_1 = self.killers[killer_index]
+        killer_2 = self.killers[killer_index + 1]
+        counter = 0
+        if board.move_stack:
+            previous = board.peek()
+            counter = self.counter_moves[previous.from_square * 64 + previous.to_square]
+        history = self.history
+        color_offset = 4096 if board.turn == chess.WHITE else 0
+
+        def priority(move):
+            code = move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+            if code == tt_code:
+                return TT_MOVE_SCORE
+            if move.promotion or board.is_capture(move):
+                return CAPTURE_SCORE + mvv_lva(board, move)
+            if code == killer_1:
+                return KILLER_SCORES[0]
+            if code == killer_2:
+                return KILLER_SCORES[1]
+            if code == counter:
+                return COUNTER_MOVE_SCORE
+            return history[color_offset + move.from_square * 64 + move.to_square]
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def record_cutoff(self, board, move, ply, depth, index):
+        """Обновляет таблицы после отсечения; board - позиция до хода."""
+        self.cutoffs += 1
+        self.cutoff_index_total += index
+        if index == 0:
+            self.first_move_cutoffs += 1
+
+        if move.promotion or board.is_capture(move):
+            return  # Взятия и так сортируются первыми
+
+        code = encode_move(move)
+        killer_index = 2 * min(ply, MAX_PLY - 1)
+        if self.killers[killer_index] != code:
+            self.killers[killer_index + 1] = self.killers[killer_index]
+            self.killers[killer_index] = code
+
+        slot = (4096 if board.turn == chess.WHITE else 0) + move.from_square * 64 + move.to_square
+        self.history[slot] += depth * depth
+        if self.history[slot] > HISTORY_MAX:
+            history = self.history
+            for entry in range(len(history)):
+                history[entry] >>= 1
+
+        if board.move_stack:
+            previous = board.peek()
+            self.counter_moves[previous.from_square * 64 + previous.to_square] = code
+
+    def first_move_cutoff_rate(self):
+        """Доля отсечений на первом ходе - основной показатель качества сортировки."""
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def average_cutoff_index(self):
+        return self.cutoff_index_total / self.cutoffs if self.cutoffs else 0.0
@@ -0,0 +1,114 @@
+import multiprocessing
+import threading
+from multiprocessing import shared_memory
+
+from chessbot import ChessBot
+from transposition import TranspositionTable
+
+# Состояние процесса-помощника
+_helper_bot = None
+_helper_memory = None
+
+
+def _init_helper(memory_name, hash_size_mb, depth, stop_event, evaluator):
+    """Инициализирует помощника: свой ChessBot поверх общей таблицы транспозиций."""
+    global _helper_bot, _helper_memory
+    _helper_memory = shared_memory.SharedMemory(name=memory_name)
+    _helper_bot = ChessBot(depth=depth, hash_size_mb=0, evaluator=evaluator)
+    _helper_bot.transposition_table = TranspositionTable(hash_size_mb, buffer=_helper_memory.buf)
+    _helper_bot.stop_event = stop_event
+
+
+def _helper_search(board, depth, max_time, max_nodes, age):
+    """Поиск помощника; результаты он передаёт главному поиску через общую таблицу."""
+    _helper_bot.depth = depth
+    # Возраст записей должен совпадать с главным процессом (find_best_move увеличит его так же)
+    _helper_bot.transposition_table.age = age
+    move = _helper_bot.find_best_move(board, max_time, max_nodes)
+    return move, _helper_bot.controller.completed_depth, _helper_bot.controller.nodes
+
+
+class ParallelSearch:
+    """Lazy SMP: несколько процессов ищут одну позицию, разделяя таблицу транспозиций.
+
+    Главный поиск идёт в текущем процессе, помощники ищут ту же позицию с чередующейся
+    глубиной и заполняют общую таблицу. С одним потоком это обычный ChessBot без процессов.
+    """
+
+    def __init__(self, depth=3, threads=1, hash_size_mb=16, evaluator='classic'):
+        self.depth = depth
+        self.threads = max(1, threads)
+        self.hash_size_mb = hash_size_mb
+        self.memory = None
+        self.pool = None
+        self.helper_nodes = 0
+
+        if self.threads == 1:
+            self.bot = ChessBot(depth=depth, hash_size_mb=hash_size_mb, evaluator=evaluator)
+            self.stop_event = threading.Event()
+            self.bot.stop_event = self.stop_event
+            return
+
+        self.memory = shared_memory.SharedMemory(create=True, size=TranspositionTable.bytes_for(hash_size_mb))
+        self.bot = ChessBot(depth=depth, hash_size_mb=0, evaluator=evaluator)
+        self.bot.transposition_table = TranspositionTable(hash_size_mb, buffer=self.memory.buf)
+        self.stop_event = multiprocessing.Event()
+        self.bot.stop_event = self.stop_event
+        self.pool = multiprocessing.Pool(self.threads - 1, initializer=_init_helper,
+                                         initargs=(self.memory.name, hash_size_mb, depth, self.stop_event,
+                                                   self.bot.evaluator.name))
+
+    @property
+    def controller(self):
+        return self.bot.controller
+
+    def find_best_move(self, board, max_time=5, max_nodes=None, depth=None, time_manager=None, controller=None):
+        """depth - предельная глубина этого поиска (по умолчанию глубина, заданная при создании).
+        time_manager или готовый controller (см. ChessBot.find_best_move) управляют главным
+        поиском; помощники останавливаются вместе с ним."""
+        if depth is not None:
+            self.depth = self.bot.depth = depth
+        if self.pool is None:
+            return self.bot.find_best_move(board, max_time, max_nodes, time_manager, controller)
+        if controller is not None:
+            max_time, max_nodes = controller.max_time, controller.max_nodes
+        elif time_manager is not None:
+            max_time = time_manager.hard_limit
+
+        age = self.bot.transposition_table.age
+        helpers = [self.pool.apply_async(_helper_search,
+                                         (board.copy(), self.depth + (index % 2), max_time, max_nodes, age))
+                   for index in range(1, self.threads)]
+        move = self.bot.find_best_move(board, max_time, max_nodes, time_manager, controller)
+
+        # Главный поиск завершён: останавливаем помощников и дожидаемся их
+        self.stop_event.set()
+        self.helper_nodes = sum(helper.get()[2] for helper in helpers)
+        self.stop_event.clear()
+        return move
+
+    def stop(self):
+        """Останавливает текущий поиск (можно вызывать из другого потока); сбрасывается вызывающим."""
+        self.stop_event.set()
+
+    def new_game(self):
+        self.bot.new_game()
+
+    def close(self):
+        """Останавливает процессы и освобождает разделяемую память."""
+        if self.pool is not None:
+            self.stop_event.set()
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        if self.memory is not None:
+            self.bot.transposition_table.release()
+            self.memory.close()
+            self.memory.unlink()
+            self.memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,5 +1,11 @@
+import argparse
+import time
+
 import chess
 from chessbot import ChessBot
+from time_manager import GameClock
+
+MAX_DEPTH = 64  # С часами глубину ограничивает время
 
 def get_player_move(board):
     while True:
@@ -14,27 +20,45 @@ def get_player_move(board):
             print("Invalid move format. Please use UCI format (e.g., 'e2e4').")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Партия с ботом")
+    parser.add_argument("--clock", type=float, default=None, help="Время на партию каждой стороне, минуты")
+    parser.add_argument("--inc", type=float, default=0.0, help="Прибавка за ход, секунды")
+    parser.add_argument("--depth", type=int, default=None, help="Глубина поиска (по умолчанию 3, с часами без предела)")
+    args = parser.parse_args()
+
     board = chess.Board()
-    bot = ChessBot(depth=3)
+    clock = GameClock(args.clock * 60, args.inc) if args.clock else None
+    bot = ChessBot(depth=args.depth or (MAX_DEPTH if clock else 3))
+    flagged = None
 
     # Выбор стороны игрока
     player_color = input("Do you want to play as white (w) or black (b)? ").strip().lower()
 
     while not board.is_game_over():
         print(board)
-        
+        if clock:
+            print(f"White {clock.format(chess.WHITE)}  Black {clock.format(chess.BLACK)}")
+        color = board.turn
+        start = time.monotonic()
+
         if (board.turn == chess.WHITE and player_color == 'w') or (board.turn == chess.BLACK and player_color == 'b'):
             # Ход игрока
             move = get_player_move(board)
             board.push(move)
         else:
             # Ход бота
-            move = bot.find_best_move(board)
+            move = bot.find_best_move(board, time_manager=clock.time_manager(color) if clock else None)
             board.push(move)
-            print(f"Bot move: {move}")
-        
+            print(f"Bot move: {move} (depth {bot.controller.completed_depth})")
+
+        if clock and not clock.spend(color, time.monotonic() - start):
+            flagged = color
+            break
+
     print("Game over!")
-    if board.is_checkmate():
+    if flagged is not None:
+        print(f"{'White' if flagged == chess.WHITE else 'Black'} lost on time!")
+    elif board.is_checkmate():
         print("Checkmate!")
     elif board.is_stalemate():
         print("Stalemate!")
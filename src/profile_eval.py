@@ -0,0 +1,37 @@
+import argparse
+import time
+
+import chess
+
+from chessbot import ChessBot
+from evaluate.profiler import EvalProfiler
+
+
+def profile_search(fen, depth=3, evaluator='classic', selective=False, max_time=None):
+    """Поиск из позиции fen с включенным профилировщиком оценки; возвращает (профилировщик, ход, секунды)."""
+    bot = ChessBot(depth=depth, selective=selective, evaluator=evaluator)
+    board = chess.Board(fen)
+    profiler = EvalProfiler(extra=[(ChessBot, 'evaluate_board')])
+    start = time.perf_counter()
+    with profiler:
+        move = bot.find_best_move(board, max_time)
+    return profiler, move, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Профиль термов оценки во время поиска")
+    parser.add_argument("fen", nargs="?", default=chess.STARTING_FEN)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--evaluator", default='full')
+    parser.add_argument("--selective", action="store_true")
+    parser.add_argument("--time", type=float, default=None, help="Лимит времени поиска, секунды")
+    parser.add_argument("--collapsed", default=None, help="Файл свернутых стеков для flamegraph")
+    args = parser.parse_args()
+
+    profiler, move, elapsed = profile_search(args.fen, args.depth, args.evaluator, args.selective, args.time)
+    print(profiler.format_flat())
+    print(f"Best move {move}, search {elapsed:.2f}s (with profiling overhead)")
+    if args.collapsed:
+        with open(args.collapsed, 'w', encoding='utf-8') as output:
+            output.write(profiler.collapsed() + "\n")
+        print(f"Collapsed stacks written to {args.collapsed}")
@@ -0,0 +1,75 @@
+import time
+
+
+class SearchAborted(Exception):
+    """Поиск прерван по времени, лимиту узлов или внешней команде."""
+
+
+class SearchController:
+    """Следит за лимитами поиска и прерывает его изнутри minimax."""
+
+    def __init__(self, max_time=None, max_nodes=None, check_interval=64, stop_event=None):
+        self.max_time = max_time
+        self.max_nodes = max_nodes
+        self.stop_event = stop_event  # threading/multiprocessing.Event для остановки извне
+        self.time_manager = None      # TimeManager: решает, начинать ли следующую итерацию
+        self.check_interval = check_interval
+        self.start()
+
+    def start(self):
+        """Начинает отсчёт времени и узлов для нового поиска."""
+        self.start_time = time.monotonic()
+        self.deadline = self.start_time + self.max_time if self.max_time is not None else None
+        self.nodes = 0
+        self.qnodes = 0
+        self.next_check = self.check_interval
+        if self.max_nodes is not None:
+            self.next_check = min(self.next_check, self.max_nodes)
+        self.stopped = False
+        self.aborted = False
+        self.completed_depth = 0
+        self.score = None
+        self.root_best_move = None
+        self.root_best_eval = None
+        self.iterations = []  # (глубина, узлы, время) для каждой завершенной итерации
+
+    def node(self):
+        """Учитывает узел; время проверяется раз в check_interval узлов."""
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.check()
+
+    def qnode(self):
+        """Учитывает узел форсированного поиска (входит и в общий счётчик узлов)."""
+        self.qnodes += 1
+        self.node()
+
+    def check(self):
+        if self.stop_event is not None and self.stop_event.is_set():
+            self.stopped = True
+        if self.stopped or (self.deadline is not None and time.monotonic() >= self.deadline) or \
+                (self.max_nodes is not None and self.nodes >= self.max_nodes):
+            self.aborted = True
+            raise SearchAborted()
+        self.next_check = self.nodes + self.check_interval
+        if self.max_nodes is not None:
+            self.next_check = min(self.next_check, self.max_nodes)
+
+    def complete_iteration(self, depth, score):
+        """Отмечает завершенную итерацию углубления."""
+        self.completed_depth = depth
+        self.score = score
+        self.iterations.append((depth, self.nodes, self.elapsed()))
+
+    def stop(self):
+        """Просит поиск остановиться при ближайшей проверке (можно вызывать из другого потока)."""
+        self.stopped = True
+        self.next_check = 0
+
+    def time_left(self):
+        if self.deadline is None:
+            return float('inf')
+        return self.deadline - time.monotonic()
+
+    def elapsed(self):
+        return time.monotonic() - self.start_time
@@ -0,0 +1,84 @@
+import json
+
+CUTOFF_INDEX_SLOTS = 16  # Отсечения на ходах с номером 15 и дальше считаются вместе
+
+
+class SearchStats:
+    """Статистика одного поиска: таблица транспозиций, отсечения по номеру хода и итерации.
+
+    Узлы и время берутся из SearchController. Поиск обновляет счетчики только если
+    у бота включена статистика (ChessBot(stats=True)); иначе проверки сводятся к "is None".
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_cutoffs = 0
+        self.beta_cutoffs = [0] * CUTOFF_INDEX_SLOTS
+        self.iterations = []
+        self.best_move = None
+        self.nodes = 0
+        self.qnodes = 0
+        self.time = 0.0
+
+    def tt_probe(self, entry):
+        self.tt_probes += 1
+        if entry is not None:
+            self.tt_hits += 1
+
+    def beta_cutoff(self, index):
+        self.beta_cutoffs[min(index, CUTOFF_INDEX_SLOTS - 1)] += 1
+
+    def tt_hit_rate(self):
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    def first_move_cutoff_rate(self):
+        total = sum(self.beta_cutoffs)
+        return self.beta_cutoffs[0] / total if total else 0.0
+
+    def add_iteration(self, depth, score, controller, pv):
+        """Запись о завершенной итерации углубления; возвращает ее словарь."""
+        previous_time = self.iterations[-1]['time'] if self.iterations else 0.0
+        elapsed = controller.elapsed()
+        iteration = {
+            'depth': depth,
+            'score': score,
+            'nodes': controller.nodes,
+            'qnodes': controller.qnodes,
+            'time': elapsed,
+            'iteration_time': elapsed - previous_time,
+            'nps': int(controller.nodes / elapsed) if elapsed > 0 else 0,
+            'tt_hit_rate': self.tt_hit_rate(),
+            'pv': [move.uci() for move in pv],
+        }
+        self.iterations.append(iteration)
+        return iteration
+
+    def finish(self, move, controller):
+        self.best_move = move
+        self.nodes = controller.nodes
+        self.qnodes = controller.qnodes
+        self.time = controller.elapsed()
+
+    def to_dict(self):
+        return {
+            'move': self.best_move.uci() if self.best_move else None,
+            'depth': self.iterations[-1]['depth'] if self.iterations else 0,
+            'score': self.iterations[-1]['score'] if self.iterations else None,
+            'pv': self.iterations[-1]['pv'] if self.iterations else [],
+            'nodes': self.nodes,
+            'qnodes': self.qnodes,
+            'time': self.time,
+            'tt_probes': self.tt_probes,
+            'tt_hits': self.tt_hits,
+            'tt_cutoffs': self.tt_cutoffs,
+            'beta_cutoffs': self.beta_cutoffs,
+            'first_move_cutoff_rate': self.first_move_cutoff_rate(),
+            'iterations': self.iterations,
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
@@ -0,0 +1,58 @@
+import chess
+
+from eval_state import PIECE_VALUES
+
+
+def captured_piece_type(board, move):
+    """Тип взятой фигуры (с учётом взятия на проходе) или None."""
+    if board.is_en_passant(move):
+        return chess.PAWN
+    return board.piece_type_at(move.to_square)
+
+
+def mvv_lva(board, move):
+    """Ключ сортировки взятий: самая ценная жертва, затем самый дешёвый нападающий."""
+    victim = captured_piece_type(board, move)
+    score = PIECE_VALUES[victim] * 10 if victim else 0
+    if move.promotion:
+        score += PIECE_VALUES[move.promotion] * 10
+    return score - PIECE_VALUES[board.piece_type_at(move.from_square)] // 10
+
+
+def static_exchange_evaluation(board, move):
+    """Итог серии разменов на поле хода (SEE) для стороны, делающей ход."""
+    target = move.to_square
+    occupied = board.occupied ^ chess.BB_SQUARES[move.from_square]
+
+    victim = captured_piece_type(board, move)
+    gains = [PIECE_VALUES[victim] if victim else 0]
+    if board.is_en_passant(move):
+        occupied ^= chess.BB_SQUARES[board.ep_square - 8 if board.turn == chess.WHITE else board.ep_square + 8]
+    attacker_value = PIECE_VALUES[board.piece_type_at(move.from_square)]
+    if move.promotion:
+        gains[0] += PIECE_VALUES[move.promotion] - PIECE_VALUES[chess.PAWN]
+        attacker_value = PIECE_VALUES[move.promotion]
+
+    side = not board.turn
+    while True:
+        attackers = board.attackers_mask(side, target, occupied) & occupied
+        if not attackers:
+            break
+        # Берём самого дешёвого нападающего
+        for piece_type in chess.PIECE_TYPES:
+            candidates = attackers & board.pieces_mask(piece_type, side)
+            if candidates:
+                break
+        if piece_type == chess.KING and board.attackers_mask(not side, target, occupied) & occupied:
+            break  # Король не может бить на защищённое поле
+        square = chess.lsb(candidates)
+        gains.append(attacker_value - gains[-1])
+        attacker_value = PIECE_VALUES[piece_type]
+        occupied ^= chess.BB_SQUARES[square]
+        side = not side
+
+    # Каждая сторона может прекратить размен, если продолжение невыгодно
+    while len(gains) > 1:
+        last = gains.pop()
+        gains[-1] = -max(-gains[-1], last)
+    return gains[0]
@@ -1,25 +1,42 @@
+import argparse
+import time
+
 import chess
 from chessbot import ChessBot
+from time_manager import GameClock
+
+MAX_DEPTH = 64  # С часами глубину ограничивает время
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Партия бота с самим собой")
+    parser.add_argument("--clock", type=float, default=None, help="Время на партию каждой стороне, минуты")
+    parser.add_argument("--inc", type=float, default=0.0, help="Прибавка за ход, секунды")
+    parser.add_argument("--depth", type=int, default=None, help="Глубина поиска (по умолчанию 3, с часами без предела)")
+    args = parser.parse_args()
+
     board = chess.Board()
-    bot = ChessBot(depth=3)
+    clock = GameClock(args.clock * 60, args.inc) if args.clock else None
+    bot = ChessBot(depth=args.depth or (MAX_DEPTH if clock else 3))
+    flagged = None
 
     while not board.is_game_over():
         print(board)
-        if board.turn == chess.WHITE:
-            # Ход бота за белых
-            move = bot.find_best_move(board)
-            board.push(move)
-            print(f"Bot (White) move: {move}")
-        else:
-            # Ход бота за черных
-            move = bot.find_best_move(board)
-            board.push(move)
-            print(f"Bot (Black) move: {move}")
+        color = board.turn
+        start = time.monotonic()
+        move = bot.find_best_move(board, time_manager=clock.time_manager(color) if clock else None)
+        board.push(move)
+        side = "White" if color == chess.WHITE else "Black"
+        print(f"Bot ({side}) move: {move} (depth {bot.controller.completed_depth})")
+        if clock:
+            if not clock.spend(color, time.monotonic() - start):
+                flagged = color
+                break
+            print(f"White {clock.format(chess.WHITE)}  Black {clock.format(chess.BLACK)}")
 
     print("Game over!")
-    if board.is_checkmate():
+    if flagged is not None:
+        print(f"{'White' if flagged == chess.WHITE else 'Black'} lost on time!")
+    elif board.is_checkmate():
         print("Checkmate!")
     elif board.is_stalemate():
         print("Stalemate!")
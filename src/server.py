@@ -0,0 +1,307 @@
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import signal
+import time
+from collections import deque
+
+import chess
+
+from chessbot import ChessBot
+from time_manager import MOVE_OVERHEAD
+from uci import allocate_time
+
+CLOCK_FIELDS = ('wtime', 'btime', 'winc', 'binc', 'movestogo')   # Часы партии, мс (как в UCI)
+LIMIT_FIELDS = ('movetime', 'depth', 'nodes')                    # Лимиты одного запроса go
+LATENCY_WINDOW = 10000                                           # Последние задержки для p50/p99
+
+
+# Долгоживущий бот процесса-исполнителя; партии переключаются через ChessBot.load_game
+_bot = None
+
+
+def _init_worker(config):
+    global _bot
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C обрабатывает главный процесс
+    _bot = ChessBot(**config)
+
+
+def _search(fen, moves, ordering, depth, max_time, max_nodes):
+    """Поиск для одной партии: состояние партии приходит с заданием и возвращается с результатом."""
+    board = chess.Board(fen)
+    for move in moves:
+        board.push_uci(move)
+    _bot.depth = depth
+    _bot.load_game(board, ordering)
+    start = time.perf_counter()
+    move = _bot.find_best_move(board, max_time, max_nodes)
+    controller = _bot.controller
+    result = {'bestmove': move.uci() if move else None, 'score': controller.score,
+              'depth': controller.completed_depth, 'nodes': controller.nodes,
+              'time': round(time.perf_counter() - start, 4)}
+    return result, _bot.move_ordering.state()
+
+
+def percentile(values, fraction):
+    """Процентиль по ближайшему рангу; None для пустой выборки."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class GameSession:
+    """Состояние одной партии на сервере: позиция с ходами, таблицы сортировки ходов и часы.
+
+    Поиск идет в общих процессах-исполнителях, поэтому все, что относится к партии,
+    хранится здесь и передается исполнителю вместе с заданием.
+    """
+
+    def __init__(self, fen=None, clock=None):
+        self.board = chess.Board(fen) if fen else chess.Board()
+        self.ordering = None  # MoveOrdering.state() после последнего поиска
+        self.clock = dict(clock or {})
+        self.lock = asyncio.Lock()  # Запросы одной партии выполняются по очереди
+        self.last_used = time.monotonic()
+
+    def push(self, moves):
+        """Ходы соперника в UCI; при недопустимом ходе позиция не меняется."""
+        if moves:
+            board = self.board.copy()
+            for move in moves:
+                board.push_uci(move)
+            self.board = board
+
+    def spend(self, color, elapsed):
+        """Списывает время хода с часов стороны color и добавляет прибавку."""
+        side, increment = ('wtime', 'winc') if color == chess.WHITE else ('btime', 'binc')
+        if side in self.clock:
+            self.clock[side] = max(0, self.clock[side] - int(elapsed * 1000)) + self.clock.get(increment, 0)
+
+
+class EngineServer:
+    """Сервер многих партий: запросы JSON по строкам через TCP или Unix-сокет, asyncio.
+
+    Поиск выполняет пул из workers процессов с долгоживущими ботами. Таблица транспозиций
+    исполнителя общая для всех партий, книга, битовые таблицы и кэш анализа открываются
+    каждым исполнителем из одних и тех же файлов (mmap), так что страницы общие.
+    Очередь ограничена max_queue запросами, сверх этого запросы отклоняются сразу;
+    запрос с deadline (мс) отклоняется, если не дождался исполнителя до срока,
+    и иначе получает время поиска не позже срока.
+    """
+
+    def __init__(self, config, workers=None, max_queue=64, session_timeout=3600):
+        self.config = dict(config)
+        self.workers = workers or multiprocessing.cpu_count()
+        self.max_queue = max_queue
+        self.session_timeout = session_timeout
+        self.pool = multiprocessing.Pool(self.workers, initializer=_init_worker, initargs=(self.config,))
+        self.slots = None  # Семафор свободных исполнителей создается в цикле событий
+        self.sessions = {}
+        self.pending = 0
+        self.active = 0
+        self.served = 0
+        self.shed = 0
+        self.expired = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    async def serve(self, host='127.0.0.1', port=7650, unix_path=None):
+        self.slots = asyncio.Semaphore(self.workers)
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_client, unix_path)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+        expiry = asyncio.create_task(self.expire_sessions())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            expiry.cancel()
+
+    async def expire_sessions(self):
+        """Удаляет партии без запросов дольше session_timeout секунд."""
+        while True:
+            await asyncio.sleep(min(60, self.session_timeout))
+            now = time.monotonic()
+            for game, session in list(self.sessions.items()):
+                if now - session.last_used > self.session_timeout and not session.lock.locked():
+                    del self.sessions[game]
+
+    async def handle_client(self, reader, writer):
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    # Запросы разных партий одного соединения выполняются параллельно
+                    task = asyncio.create_task(self.respond(line, writer, write_lock))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def respond(self, line, writer, write_lock):
+        received = time.monotonic()
+        request = {}
+        try:
+            request = json.loads(line)
+            response = await self.dispatch(request, received)
+        except (ValueError, KeyError, TypeError) as error:
+            response = {'error': str(error)}
+        if isinstance(request, dict) and 'id' in request:
+            response['id'] = request['id']
+        async with write_lock:
+            writer.write((json.dumps(response) + "\n").encode())
+            await writer.drain()
+
+    async def dispatch(self, request, received):
+        op = request['op']
+        if op == 'stats':
+            return self.stats()
+        game = str(request['game'])
+        if op == 'new':
+            clock = {field: request[field] for field in CLOCK_FIELDS if field in request}
+            self.sessions[game] = GameSession(request.get('fen'), clock)
+            return {'game': game, 'ok': True}
+
+        session = self.sessions.get(game)
+        if session is None:
+            return {'game': game, 'error': 'unknown game'}
+        session.last_used = received
+        if op == 'end':
+            del self.sessions[game]
+            return {'game': game, 'ok': True}
+        async with session.lock:
+            session.push(request.get('moves', ()))
+            if op == 'move':
+                return {'game': game, 'ok': True}
+            if op == 'go':
+                response = await self.search(session, request, received)
+                response['game'] = game
+                return response
+        return {'game': game, 'error': f'unknown op {op}'}
+
+    async def search(self, session, request, received):
+        """Ход бота в партии; вызывается под session.lock."""
+        board = session.board
+        if board.is_game_over():
+            return {'error': 'game over', 'result': board.result()}
+        session.clock.update((field, request[field]) for field in CLOCK_FIELDS if field in request)
+        deadline = received + request['deadline'] / 1000 if 'deadline' in request else None
+
+        # Сброс нагрузки: очередь ограничена, запрос не ждет исполнителя дольше своего срока
+        if self.pending >= self.max_queue:
+            self.shed += 1
+            return {'error': 'overloaded'}
+        self.pending += 1
+        try:
+            if deadline is None:
+                await self.slots.acquire()
+            else:
+                await asyncio.wait_for(self.slots.acquire(), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            self.expired += 1
+            return {'error': 'deadline expired'}
+        finally:
+            self.pending -= 1
+
+        submitted = False
+        try:
+            started = time.monotonic()
+            params = dict(session.clock)
+            params.update((field, request[field]) for field in LIMIT_FIELDS if field in request)
+            max_time = allocate_time(params, board.turn)
+            if deadline is not None:
+                remaining = deadline - started - MOVE_OVERHEAD
+                if remaining <= 0:
+                    self.expired += 1
+                    return {'error': 'deadline expired'}
+                max_time = remaining if max_time is None else min(max_time, remaining)
+            depth = params.get('depth', self.config.get('depth', 3))
+            job = self.run(board.root().fen(), [move.uci() for move in board.move_stack],
+                           session.ordering, depth, max_time, params.get('nodes'))
+            submitted = True
+        finally:
+            if not submitted:
+                self.slots.release()
+        result, ordering = await job
+
+        session.ordering = ordering
+        if result['bestmove'] is not None:
+            session.spend(board.turn, time.monotonic() - started)
+            board.push_uci(result['bestmove'])
+        latency = time.monotonic() - received
+        self.latencies.append(latency)
+        self.served += 1
+        result['queued'] = round(started - received, 4)
+        result['latency'] = round(latency, 4)
+        return result
+
+    def run(self, *args):
+        """Задание пулу исполнителей как future цикла событий; занятый слот исполнителя
+        освобождается, когда задание закончилось, даже если ответа уже никто не ждет."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(method, value):
+            self.active -= 1
+            self.slots.release()
+            if not future.done():  # Клиент мог отключиться, не дождавшись ответа
+                method(value)
+
+        self.pool.apply_async(_search, args,
+                              callback=lambda value: loop.call_soon_threadsafe(resolve, future.set_result, value),
+                              error_callback=lambda error: loop.call_soon_threadsafe(resolve, future.set_exception,
+                                                                                   error))
+        self.active += 1
+        return future
+
+    def stats(self):
+        latencies = list(self.latencies)
+        p50, p99 = percentile(latencies, 0.5), percentile(latencies, 0.99)
+        return {'games': len(self.sessions), 'workers': self.workers, 'active': self.active,
+                'pending': self.pending, 'served': self.served, 'shed': self.shed, 'expired': self.expired,
+                'latency_p50_ms': round(p50 * 1000, 1) if p50 is not None else None,
+                'latency_p99_ms': round(p99 * 1000, 1) if p99 is not None else None}
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сервер многих партий (JSON по строкам)")
+    parser.add_argument("--host", default='127.0.0.1')
+    parser.add_argument("--port", type=int, default=7650)
+    parser.add_argument("--unix", default=None, help="Путь Unix-сокета вместо TCP")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--evaluator", default='classic')
+    parser.add_argument("--hash", type=int, default=16, help="Таблица транспозиций каждого исполнителя, МБ")
+    parser.add_argument("--book", default=None, help="Дебютная книга Polyglot")
+    parser.add_argument("--bitbases", default=None, help="Каталог битовых таблиц эндшпиля")
+    parser.add_argument("--cache", default=None, help="Файл общего кэша анализа")
+    parser.add_argument("--max-queue", type=int, default=64, help="Запросов в очереди до отказа")
+    parser.add_argument("--session-timeout", type=float, default=3600, help="Секунд до удаления брошенной партии")
+    args = parser.parse_args()
+
+    config = {'depth': args.depth, 'evaluator': args.evaluator, 'hash_size_mb': args.hash,
+              'book': args.book, 'bitbases': args.bitbases, 'cache': args.cache}
+    engine_server = EngineServer(config, max(1, args.workers), args.max_queue, args.session_timeout)
+    try:
+        asyncio.run(engine_server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine_server.close()
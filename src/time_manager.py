@@ -0,0 +1,89 @@
+import time
+
+import chess
+
+MOVE_OVERHEAD = 0.05        # Запас на задержки GUI и передачу хода, секунды
+DEFAULT_MOVES_TO_GO = 30    # Сколько ходов еще рассчитывать на оставшееся время без контроля
+INCREMENT_SHARE = 0.8       # Доля прибавки, которую тратим на текущий ход
+HARD_FACTOR = 4.0           # Жесткий лимит - во сколько раз можно превысить мягкий
+MAX_SOFT_SHARE = 0.2        # Мягкий лимит не больше этой доли оставшегося времени
+MAX_HARD_SHARE = 0.5        # Жесткий лимит никогда не больше половины оставшегося времени
+# Множитель мягкого лимита по числу итераций подряд с тем же лучшим ходом
+STABILITY_SCALES = (1.5, 1.2, 1.0, 0.85, 0.7, 0.6)
+SCORE_DROP_SCALE = 100      # Падение оценки на столько сантипешек удваивает мягкий лимит
+MAX_DROP_FACTOR = 2.0
+
+
+class TimeManager:
+    """Время на ход по часам партии (секунды): мягкий и жесткий лимит.
+
+    Жесткий лимит прерывает поиск изнутри (SearchController). Мягкий решает, начинать ли
+    следующую итерацию углубления: он сокращается, пока лучший ход не меняется, растет
+    после смены хода и при падении оценки, а единственный легальный ход не ищется дальше
+    первой итерации.
+    """
+
+    def __init__(self, remaining, increment=0.0, moves_to_go=None, overhead=MOVE_OVERHEAD):
+        self.start_time = time.monotonic()
+        available = max(0.0, remaining - overhead)
+        if moves_to_go == 1:
+            # Последний ход перед контролем: можно тратить почти все время
+            self.soft_limit = self.hard_limit = available * 0.9
+        else:
+            base = remaining / (moves_to_go or DEFAULT_MOVES_TO_GO) + increment * INCREMENT_SHARE
+            self.hard_limit = max(0.0, min(base * HARD_FACTOR, available * MAX_HARD_SHARE, available))
+            self.soft_limit = min(base, available * MAX_SOFT_SHARE, self.hard_limit)
+        self.limit = self.soft_limit
+        self.best_move = None
+        self.stable_iterations = 0
+        self.previous_score = None
+
+    def elapsed(self):
+        return time.monotonic() - self.start_time
+
+    def continue_search(self, depth, best_move, score, root_moves=None):
+        """Вызывается после каждой завершенной итерации: начинать ли следующую.
+
+        score - оценка относительно стороны хода, root_moves - число легальных ходов корня.
+        """
+        if root_moves == 1:
+            return False  # Ход вынужден, глубже искать незачем
+        if best_move == self.best_move:
+            self.stable_iterations += 1
+        else:
+            self.best_move = best_move
+            self.stable_iterations = 0
+        stability = STABILITY_SCALES[min(self.stable_iterations, len(STABILITY_SCALES) - 1)]
+
+        drop = 1.0
+        if score is not None and self.previous_score is not None and score < self.previous_score:
+            drop = min(MAX_DROP_FACTOR, 1.0 + (self.previous_score - score) / SCORE_DROP_SCALE)
+        if score is not None:
+            self.previous_score = score
+
+        self.limit = min(self.hard_limit, self.soft_limit * stability * drop)
+        return self.elapsed() < self.limit
+
+
+class GameClock:
+    """Часы партии для обеих сторон (секунды) с прибавкой за ход."""
+
+    def __init__(self, base, increment=0.0):
+        self.remaining = {chess.WHITE: float(base), chess.BLACK: float(base)}
+        self.increment = increment
+
+    def time_manager(self, color):
+        return TimeManager(self.remaining[color], self.increment)
+
+    def spend(self, color, elapsed):
+        """Списывает время хода; возвращает False, если у стороны упал флажок."""
+        self.remaining[color] -= elapsed
+        if self.remaining[color] <= 0:
+            self.remaining[color] = 0.0
+            return False
+        self.remaining[color] += self.increment
+        return True
+
+    def format(self, color):
+        minutes, seconds = divmod(self.remaining[color], 60)
+        return f"{int(minutes)}:{seconds:04.1f}"
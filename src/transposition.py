@@ -0,0 +1,144 @@
+import chess
+
+# Типы оценок, хранимых в таблице
+EXACT = 0        # Точная оценка
+LOWER_BOUND = 1  # Оценка не меньше сохранённой (отсечение по beta)
+UPPER_BOUND = 2  # Оценка не больше сохранённой (ни один ход не поднял alpha)
+
+# Упаковка записи в одно 64-битное слово:
+# биты 0-31 оценка со смещением, 32-39 глубина, 40-41 тип оценки, 42-57 ход, 58-63 возраст
+SCORE_OFFSET = 1 << 31
+DEPTH_SHIFT = 32
+BOUND_SHIFT = 40
+MOVE_SHIFT = 42
+AGE_SHIFT = 58
+AGE_MASK = 0x3F
+
+ENTRY_BYTES = 16   # Ключ + данные
+BUCKET_SIZE = 2    # Слот с приоритетом глубины и слот "всегда заменять"
+
+
+def encode_move(move):
+    """Кодирует ход в 16 бит: from | to << 6 | promotion << 12. Ноль означает отсутствие хода."""
+    if move is None:
+        return 0
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def decode_move(code):
+    """Обратное преобразование для encode_move."""
+    if not code:
+        return None
+    return chess.Move(code & 0x3F, (code >> 6) & 0x3F, (code >> 12) or None)
+
+
+class TTEntry:
+    """Распакованная запись таблицы транспозиций."""
+    __slots__ = ('depth', 'score', 'bound', 'move')
+
+    def __init__(self, depth, score, bound, move):
+        self.depth = depth
+        self.score = score
+        self.bound = bound
+        self.move = move
+
+
+class TranspositionTable:
+    """Таблица транспозиций фиксированного размера на массиве 64-битных слов.
+
+    Каждая запись занимает два слова: ключ, сложенный по XOR с данными, и сами данные.
+    Порванная запись (одновременная запись из двух процессов) не проходит проверку ключа,
+    поэтому таблицу можно без блокировок разместить в разделяемой памяти.
+    """
+
+    def __init__(self, size_mb=16, buffer=None):
+        if buffer is not None:
+            self.attach(buffer, size_mb)
+        else:
+            self.resize(size_mb)
+
+    @staticmethod
+    def bytes_for(size_mb):
+        """Размер буфера в байтах для бюджета памяти (число корзин округляется до степени двойки)."""
+        entries = max(BUCKET_SIZE, int(size_mb * 1024 * 1024) // ENTRY_BYTES)
+        buckets = 1 << ((entries // BUCKET_SIZE).bit_length() - 1)
+        return buckets * BUCKET_SIZE * ENTRY_BYTES
+
+    def resize(self, size_mb):
+        """Выделяет таблицу под бюджет памяти в мегабайтах."""
+        self.attach(bytearray(self.bytes_for(size_mb)), size_mb)
+
+    def attach(self, buffer, size_mb):
+        """Использует готовый буфер (например, multiprocessing.shared_memory) как хранилище."""
+        self.size_mb = size_mb
+        self.raw = memoryview(buffer)[:self.bytes_for(size_mb)]
+        self.slots = self.raw.cast('Q')
+        self.mask = len(self.slots) // (2 * BUCKET_SIZE) - 1
+        self.age = 0
+
+    def release(self):
+        """Освобождает представления буфера (нужно перед закрытием разделяемой памяти)."""
+        self.slots.release()
+        self.raw.release()
+
+    def clear(self):
+        """Очищает таблицу без перевыделения памяти."""
+        self.raw[:] = bytes(len(self.raw))
+        self.age = 0
+
+    def new_search(self):
+        """Увеличивает возраст: записи прошлых поисков вытесняются в первую очередь."""
+        self.age = (self.age + 1) & AGE_MASK
+
+    def probe(self, key):
+        """Возвращает TTEntry для ключа или None."""
+        index = (key & self.mask) * BUCKET_SIZE * 2
+        slots = self.slots
+        for slot in range(index, index + BUCKET_SIZE * 2, 2):
+            data = slots[slot + 1]
+            if slots[slot] ^ data == key:
+                return TTEntry((data >> DEPTH_SHIFT) & 0xFF,
+                               (data & 0xFFFFFFFF) - SCORE_OFFSET,
+                               (data >> BOUND_SHIFT) & 0x3,
+                               decode_move((data >> MOVE_SHIFT) & 0xFFFF))
+        return None
+
+    def store(self, key, depth, score, bound, move=None):
+        """Сохраняет запись по схеме "приоритет глубины + всегда заменять" с учётом возраста."""
+        index = (key & self.mask) * BUCKET_SIZE * 2
+        slots = self.slots
+        move_code = encode_move(move)
+
+        slot = None
+        for candidate in range(index, index + BUCKET_SIZE * 2, 2):
+            stored = slots[candidate + 1]
+            if slots[candidate] ^ stored == key:
+                slot = candidate
+                if not move_code:
+                    # Не теряем лучший ход, найденный ранее для этой позиции
+                    move_code = (stored >> MOVE_SHIFT) & 0xFFFF
+                break
+
+        if slot is None:
+            stored = slots[index + 1]
+            stored_depth = (stored >> DEPTH_SHIFT) & 0xFF
+            stored_age = (stored >> AGE_SHIFT) & AGE_MASK
+            if stored_age != self.age or depth >= stored_depth:
+                slot = index
+            else:
+                slot = index + 2
+
+        data = ((int(score) + SCORE_OFFSET) & 0xFFFFFFFF) | (min(depth, 0xFF) << DEPTH_SHIFT) | \
+            (bound << BOUND_SHIFT) | (move_code << MOVE_SHIFT) | (self.age << AGE_SHIFT)
+        slots[slot] = key ^ data
+        slots[slot + 1] = data
+
+    def hashfull(self):
+        """Доля (в промилле) заполненных записей текущего возраста по первой тысяче записей."""
+        sample = min(1000, len(self.slots) // 2)
+        used = 0
+        for slot in range(0, sample * 2, 2):
+            data = self.slots[slot + 1]
+            if data and (data >> AGE_SHIFT) & AGE_MASK == self.age:
+                used += 1
+        return used * 1000 // sample
@@ -0,0 +1,268 @@
+import argparse
+import io
+import json
+import math
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+import chess
+import chess.pgn
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from analyze import bounded
+from evaluate.attack_maps import AttackMaps
+from evaluate.batch import (PLANES, MATERIAL, PIECE_SQUARE, encode_board, to_planes, pawn_structure_counts,
+                            passed_pawn_ranks)
+from evaluate.weights import WEIGHTS, WEIGHTS_PATH, weights_hash
+from see import static_exchange_evaluation
+
+# Столбцы матрицы признаков: результат партии за белых, оценка без настраиваемых термов, признаки
+FEATURES = ('pawn_island', 'isolated_pawn', 'doubled_pawn') + \
+           tuple(f'passed_pawn_{rank}' for rank in range(1, 7)) + ('space',)
+COLUMNS = ('result', 'base') + FEATURES
+RESULTS = {'1-0': 1.0, '0-1': 0.0, '1/2-1/2': 0.5}
+
+# Запись позиции между проходами: битборды, разница пространства и результат
+POSITION = np.dtype([('bitboards', '<u8', (len(PLANES),)), ('space', '<i2'), ('result', '<f4')])
+GAMES_PER_TASK = 64
+ROWS_PER_CHUNK = 1 << 15
+
+
+def is_quiet(board):
+    """Позиция без шаха и выгодных взятий: статическая оценка в ней осмысленна."""
+    if board.is_check():
+        return False
+    return not any(static_exchange_evaluation(board, move) > 0
+                   for move in board.generate_legal_captures())
+
+
+def split_games(paths):
+    """Тексты партий из PGN-файлов без разбора (разбирают процессы-исполнители)."""
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as pgn:
+            lines = []
+            moves_seen = False  # Новая партия начинается с заголовка после ходов предыдущей
+            for line in pgn:
+                if line.startswith('['):
+                    if moves_seen:
+                        yield ''.join(lines)
+                        lines = []
+                        moves_seen = False
+                elif line.strip():
+                    moves_seen = True
+                lines.append(line)
+            if lines:
+                yield ''.join(lines)
+
+
+def chunked(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _init_worker():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C обрабатывает главный процесс
+
+
+def _extract_games(texts, min_ply):
+    """Тихие позиции партий с известным результатом: байты записей POSITION."""
+    rows = []
+    for text in texts:
+        game = chess.pgn.read_game(io.StringIO(text))
+        if game is None or game.headers.get('Result') not in RESULTS:
+            continue
+        result = RESULTS[game.headers['Result']]
+        board = game.board()
+        for ply, move in enumerate(game.mainline_moves()):
+            if ply >= min_ply and is_quiet(board):
+                attack_maps = AttackMaps(board)
+                rows.append((encode_board(board), attack_maps.space(chess.WHITE) - attack_maps.space(chess.BLACK),
+                             result))
+            board.push(move)
+    return np.array(rows, dtype=POSITION).tobytes()
+
+
+def _extract_task(task):
+    return _extract_games(*task)
+
+
+def feature_rows(positions):
+    """Матрица (N, COLUMNS) для массива записей POSITION, целиком в NumPy."""
+    planes = to_planes(positions['bitboards'])
+    rows = np.empty((len(positions), len(COLUMNS)), dtype=np.float32)
+    rows[:, 0] = positions['result']
+    rows[:, 1] = planes.sum(axis=2, dtype=np.int64) @ MATERIAL + \
+        np.einsum('nps,ps->n', planes, PIECE_SQUARE, dtype=np.int64)
+    # Штрафы входят со знаком минус, чтобы веса в файле оставались положительными штрафами
+    white, black = pawn_structure_counts(planes[:, 0]), pawn_structure_counts(planes[:, 6])
+    for column, (white_count, black_count) in enumerate(zip(white, black), 2):
+        rows[:, column] = black_count - white_count
+    passed = passed_pawn_ranks(planes[:, 0], planes[:, 6], chess.WHITE) - \
+        passed_pawn_ranks(planes[:, 6], planes[:, 0], chess.BLACK)
+    rows[:, 5:11] = passed[:, 1:7]
+    rows[:, 11] = positions['space']
+    return rows
+
+
+def extract(pgn_paths, output_path, workers=None, min_ply=8):
+    """Признаки тихих позиций из PGN в output_path (.npy); возвращает число позиций.
+
+    Партии разбираются пулом процессов, записи потоком пишутся на диск, затем матрица
+    признаков заполняется блоками через memmap - память не зависит от числа позиций.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    window = threading.BoundedSemaphore(workers * 4)
+    stopped = threading.Event()
+    temporary = output_path + '.positions'
+    count = 0
+    start = time.monotonic()
+    tasks = ((texts, min_ply) for texts in chunked(split_games(pgn_paths), GAMES_PER_TASK))
+    pool = multiprocessing.Pool(workers, initializer=_init_worker)
+    try:
+        with open(temporary, 'wb') as positions_file:
+            for data in pool.imap(_extract_task, bounded(tasks, window, stopped)):
+                window.release()
+                positions_file.write(data)
+                count += len(data) // POSITION.itemsize
+    except BaseException:
+        os.remove(temporary)
+        raise
+    finally:
+        stopped.set()
+        pool.terminate()
+        pool.join()
+    print(f"{count} quiet positions in {time.monotonic() - start:.1f}s", flush=True)
+
+    try:
+        positions = np.memmap(temporary, dtype=POSITION, mode='r') if count else np.empty(0, dtype=POSITION)
+        matrix = open_memmap(output_path, mode='w+', dtype=np.float32, shape=(count, len(COLUMNS)))
+        for row in range(0, count, ROWS_PER_CHUNK):
+            matrix[row:row + ROWS_PER_CHUNK] = feature_rows(positions[row:row + ROWS_PER_CHUNK])
+        matrix.flush()
+        del positions, matrix
+    finally:
+        os.remove(temporary)
+    return count
+
+
+def initial_weights(weights=WEIGHTS):
+    return np.array([weights['pawn_island'], weights['isolated_pawn'], weights['doubled_pawn']] +
+                    list(weights['passed_pawn'][1:7]) + [weights['space']], dtype=np.float64)
+
+
+def weights_dict(vector):
+    values = [int(round(value)) for value in vector]
+    return {'pawn_island': values[0], 'isolated_pawn': values[1], 'doubled_pawn': values[2],
+            'passed_pawn': [0] + values[3:9] + [0], 'space': values[9]}
+
+
+def batches(matrix, start, stop, size):
+    """Блоки (результат, базовая оценка, признаки) из матрицы на диске."""
+    for row in range(start, stop, size):
+        block = np.asarray(matrix[row:min(row + size, stop)], dtype=np.float64)
+        yield block[:, 0], block[:, 1], block[:, 2:]
+
+
+def win_probability(scores, scale):
+    """Ожидаемый результат за белых по оценке: 1 / (1 + 10^(-K * s / 400))."""
+    return 1.0 / (1.0 + np.power(10.0, np.clip(-scale * scores / 400, -30, 30)))
+
+
+def log_loss(matrix, weights, scale, start, stop, size):
+    total = 0.0
+    for result, base, features in batches(matrix, start, stop, size):
+        probability = np.clip(win_probability(base + features @ weights, scale), 1e-12, 1 - 1e-12)
+        total -= np.sum(result * np.log(probability) + (1 - result) * np.log(1 - probability))
+    return total / max(1, stop - start)
+
+
+def fit_scale(matrix, weights, stop, size, low=0.05, high=5.0, steps=40):
+    """Коэффициент K сигмоиды для текущих весов (троичный поиск минимума потерь)."""
+    for _ in range(steps):
+        left, right = low + (high - low) / 3, high - (high - low) / 3
+        if log_loss(matrix, weights, left, 0, stop, size) < log_loss(matrix, weights, right, 0, stop, size):
+            high = right
+        else:
+            low = left
+    return (low + high) / 2
+
+
+def fit(matrix_path, epochs=20, batch_size=1 << 14, learning_rate=1.0, validation=0.1, scale=None, seed=1):
+    """Подбор весов пакетным градиентным спуском (Adam) по логистической функции потерь.
+
+    Базовая оценка (материал и фигура-поле) не меняется и задает масштаб; K подбирается
+    под исходные веса по не более чем миллиону позиций. Возвращает (веса, K, история потерь).
+    """
+    matrix = np.load(matrix_path, mmap_mode='r')
+    count = len(matrix)
+    split = count - int(count * validation)
+    weights = initial_weights()
+    if scale is None:
+        scale = fit_scale(matrix, weights, min(split, 1 << 20), batch_size)
+    factor = scale * math.log(10) / 400  # Производная сигмоиды по оценке: p(1 - p) * factor
+
+    rng = np.random.default_rng(seed)
+    first = np.zeros_like(weights)
+    second = np.zeros_like(weights)
+    step = 0
+    history = [(log_loss(matrix, weights, scale, 0, split, batch_size),
+                log_loss(matrix, weights, scale, split, count, batch_size))]
+    print(f"K {scale:.3f}, loss {history[0][0]:.5f} (validation {history[0][1]:.5f})", flush=True)
+    starts = np.arange(0, split, batch_size)
+    for epoch in range(1, epochs + 1):
+        rng.shuffle(starts)  # Порядок блоков случайный, чтение внутри блока последовательное
+        for row in starts:
+            result, base, features = next(batches(matrix, row, min(row + batch_size, split), batch_size))
+            probability = win_probability(base + features @ weights, scale)
+            gradient = features.T @ (probability - result) * factor / len(result)
+            step += 1
+            first = 0.9 * first + 0.1 * gradient
+            second = 0.999 * second + 0.001 * gradient * gradient
+            weights -= learning_rate * (first / (1 - 0.9 ** step)) / (np.sqrt(second / (1 - 0.999 ** step)) + 1e-8)
+        history.append((log_loss(matrix, weights, scale, 0, split, batch_size),
+                        log_loss(matrix, weights, scale, split, count, batch_size)))
+        print(f"epoch {epoch}: loss {history[-1][0]:.5f} (validation {history[-1][1]:.5f})", flush=True)
+    return weights, scale, history
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Настройка весов оценки по результатам партий (Texel)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    extract_parser = commands.add_parser('extract', help="Признаки тихих позиций из PGN в .npy")
+    extract_parser.add_argument("pgn", nargs="+")
+    extract_parser.add_argument("-o", "--output", default="positions.npy")
+    extract_parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    extract_parser.add_argument("--min-ply", type=int, default=8, help="Пропускаемые полуходы дебюта")
+    fit_parser = commands.add_parser('fit', help="Подбор весов по матрице признаков")
+    fit_parser.add_argument("matrix")
+    fit_parser.add_argument("-o", "--output", default=WEIGHTS_PATH, help="Файл весов, загружаемый оценкой")
+    fit_parser.add_argument("--epochs", type=int, default=20)
+    fit_parser.add_argument("--batch", type=int, default=1 << 14, help="Позиций в пакете")
+    fit_parser.add_argument("--rate", type=float, default=1.0, help="Шаг Adam (в единицах веса)")
+    fit_parser.add_argument("--validation", type=float, default=0.1, help="Доля позиций для проверки")
+    fit_parser.add_argument("--scale", type=float, default=None, help="K сигмоиды (по умолчанию подбирается)")
+    args = parser.parse_args()
+
+    if args.command == 'extract':
+        count = extract(args.pgn, args.output, max(1, args.workers), args.min_ply)
+        print(f"{count} positions, {len(COLUMNS)} columns written to {args.output}")
+    else:
+        weights, scale, history = fit(args.matrix, args.epochs, args.batch, args.rate, args.validation, args.scale)
+        tuned = weights_dict(weights)
+        with open(args.output, 'w', encoding='utf-8') as weights_file:
+            json.dump(tuned, weights_file, indent=2)
+            weights_file.write("\n")
+        print(f"Weights written to {args.output}: {tuned}")
+        if weights_hash(dict(WEIGHTS, **tuned)) != weights_hash(WEIGHTS):
+            # Запасы ленивой оценки посчитаны для старых весов, оценка не будет их использовать
+            print("Lazy eval margins are stale until rebuilt: python build_lazy_margins.py --input GAMES.pgn")
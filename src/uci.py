@@ -0,0 +1,286 @@
+import os
+import sys
+import threading
+import time
+
+import chess
+
+from evaluate import available_evaluators
+from parallel import ParallelSearch
+from search_control import SearchController
+from search_stats import SearchStats
+from time_manager import TimeManager, MOVE_OVERHEAD
+from zobrist import zobrist_hash
+
+ENGINE_NAME = "Ocoon"
+ENGINE_AUTHOR = "wwweblo"
+MAX_DEPTH = 64           # Предельная глубина итеративного углубления без ограничения depth
+
+OPTIONS = {
+    'Hash': {'type': 'spin', 'default': 16, 'min': 1, 'max': 4096},
+    'Threads': {'type': 'spin', 'default': 1, 'min': 1, 'max': os.cpu_count() or 1},
+    'Evaluator': {'type': 'combo', 'default': 'classic', 'vars': available_evaluators()},
+    'Ponder': {'type': 'check', 'default': False},
+}
+
+
+def parse_go(tokens):
+    """Параметры команды go: числа (мс, глубина, узлы) и флаги infinite/ponder."""
+    params = {}
+    numeric = ('wtime', 'btime', 'winc', 'binc', 'movestogo', 'movetime', 'depth', 'nodes')
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        if token in numeric and index + 1 < len(tokens):
+            params[token] = int(tokens[index + 1])
+            index += 2
+            continue
+        if token in ('infinite', 'ponder'):
+            params[token] = True
+        index += 1
+    return params
+
+
+def time_manager_for(params, color):
+    """TimeManager по часам команды go (wtime/btime, мс) или None без часов и при movetime."""
+    if 'movetime' in params:
+        return None
+    remaining = params.get('wtime' if color == chess.WHITE else 'btime')
+    if remaining is None:
+        return None
+    increment = params.get('winc' if color == chess.WHITE else 'binc', 0)
+    return TimeManager(remaining / 1000, increment / 1000, params.get('movestogo'))
+
+
+def allocate_time(params, color):
+    """Фиксированное время на ход в секундах (movetime или мягкий лимит по часам) или None."""
+    if 'movetime' in params:
+        return max(0.0, params['movetime'] / 1000 - MOVE_OVERHEAD)
+    manager = time_manager_for(params, color)
+    return manager.soft_limit if manager is not None else None
+
+
+class UCIEngine:
+    """UCI-обертка над ChessBot: поиск идет в рабочем потоке, команды обрабатываются во время поиска.
+
+    Таблица транспозиций сохраняется между ходами, поэтому размышление на время соперника
+    (go ponder) заполняет ее для следующего поиска.
+    """
+
+    def __init__(self, output=None):
+        self.output = output or sys.stdout
+        self.output_lock = threading.Lock()
+        self.options = {name: option['default'] for name, option in OPTIONS.items()}
+        self.search = None
+        self.board = chess.Board()
+        self.thread = None
+        self.release = threading.Event()  # Разрешает вывести bestmove после ponder/infinite
+        self.go_params = {}
+        self.search_color = chess.WHITE
+        self.controller = None  # Лимиты текущего поиска; создаются в go, чтобы ponderhit не опоздал
+
+    def send(self, line):
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def engine(self):
+        """Поиск с текущими настройками (создается при первом использовании и после setoption)."""
+        if self.search is None:
+            self.search = ParallelSearch(depth=MAX_DEPTH, threads=self.options['Threads'],
+                                         hash_size_mb=self.options['Hash'], evaluator=self.options['Evaluator'])
+            self.search.bot.stats = SearchStats()
+            self.search.bot.on_iteration = self.report_iteration
+        return self.search
+
+    def handle(self, line):
+        """Обрабатывает одну команду; возвращает False после quit."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, arguments = tokens[0], tokens[1:]
+        if command == 'uci':
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_AUTHOR}")
+            for name, option in OPTIONS.items():
+                self.send(self.option_line(name, option))
+            self.send("uciok")
+        elif command == 'isready':
+            self.engine()
+            self.send("readyok")
+        elif command == 'setoption':
+            self.set_option(arguments)
+        elif command == 'ucinewgame':
+            self.wait()
+            self.engine().new_game()
+            self.board = chess.Board()
+        elif command == 'position':
+            self.wait()
+            self.set_position(arguments)
+        elif command == 'go':
+            self.wait()
+            self.go(parse_go(arguments))
+        elif command == 'stop':
+            self.stop()
+        elif command == 'ponderhit':
+            self.ponderhit()
+        elif command == 'quit':
+            self.stop()
+            if self.search is not None:
+                self.search.close()
+            return False
+        return True
+
+    @staticmethod
+    def option_line(name, option):
+        line = f"option name {name} type {option['type']} default {str(option['default']).lower() if option['type'] == 'check' else option['default']}"
+        if option['type'] == 'spin':
+            line += f" min {option['min']} max {option['max']}"
+        elif option['type'] == 'combo':
+            line += "".join(f" var {value}" for value in option['vars'])
+        return line
+
+    def set_option(self, arguments):
+        if 'name' not in arguments:
+            return
+        value_index = arguments.index('value') if 'value' in arguments else len(arguments)
+        name = " ".join(arguments[arguments.index('name') + 1:value_index])
+        value = " ".join(arguments[value_index + 1:])
+        option = next((OPTIONS[known] for known in OPTIONS if known.lower() == name.lower()), None)
+        if option is None:
+            self.send(f"info string unknown option {name}")
+            return
+        name = next(known for known in OPTIONS if known.lower() == name.lower())
+        if option['type'] == 'spin':
+            value = max(option['min'], min(option['max'], int(value)))
+        elif option['type'] == 'check':
+            value = value.lower() == 'true'
+        elif value not in option['vars']:
+            self.send(f"info string invalid value {value} for {name}")
+            return
+        self.wait()
+        self.options[name] = value
+        if name in ('Hash', 'Threads', 'Evaluator') and self.search is not None:
+            self.search.close()
+            self.search = None
+
+    def set_position(self, arguments):
+        if not arguments:
+            return
+        if arguments[0] == 'startpos':
+            board = chess.Board()
+            rest = arguments[1:]
+        elif arguments[0] == 'fen':
+            fen_end = arguments.index('moves') if 'moves' in arguments else len(arguments)
+            board = chess.Board(" ".join(arguments[1:fen_end]))
+            rest = arguments[fen_end:]
+        else:
+            return
+        if rest and rest[0] == 'moves':
+            for uci_move in rest[1:]:
+                board.push_uci(uci_move)
+        self.board = board
+
+    def go(self, params):
+        search = self.engine()
+        search.stop_event.clear()
+        self.release.clear()
+        self.go_params = params
+        self.search_color = self.board.turn
+        manager = None
+        if params.get('ponder') or params.get('infinite'):
+            max_time = None  # Ждем stop или ponderhit
+        else:
+            self.release.set()
+            manager = time_manager_for(params, self.board.turn)
+            max_time = manager.hard_limit if manager is not None else allocate_time(params, self.board.turn)
+        # Контроллер создается до запуска потока: ponderhit может прийти раньше, чем начнется поиск
+        self.controller = SearchController(max_time, params.get('nodes'), stop_event=search.stop_event)
+        self.controller.time_manager = manager
+        depth = params.get('depth', MAX_DEPTH)
+        board = self.board.copy()
+        self.thread = threading.Thread(target=self.run_search, args=(board, depth, self.controller), daemon=True)
+        self.thread.start()
+
+    def report_iteration(self, stats, iteration):
+        """Строка info после каждой завершенной итерации главного поиска."""
+        info = f"info depth {iteration['depth']}"
+        if iteration['score'] is not None:
+            info += f" score cp {int(iteration['score'])}"
+        info += f" nodes {iteration['nodes']} nps {iteration['nps']} time {int(iteration['time'] * 1000)}"
+        if iteration['pv']:
+            info += " pv " + " ".join(iteration['pv'])
+        self.send(info)
+
+    def run_search(self, board, depth, controller):
+        search = self.search
+        move = search.find_best_move(board, depth=depth, controller=controller)
+        elapsed = controller.elapsed()
+        nodes = controller.nodes + search.helper_nodes
+        # Итог поиска с узлами помощников Lazy SMP; итерации уже выведены report_iteration
+        self.send(f"info nodes {nodes} time {int(elapsed * 1000)} nps {int(nodes / elapsed) if elapsed > 0 else 0}")
+
+        # В режиме ponder/infinite bestmove выводится только после stop или ponderhit
+        self.release.wait()
+        if move is None:
+            self.send("bestmove 0000")
+            return
+        ponder = self.ponder_move(board, move)
+        self.send(f"bestmove {move.uci()}" + (f" ponder {ponder.uci()}" if ponder else ""))
+
+    def ponder_move(self, board, move):
+        """Ожидаемый ответ соперника из таблицы транспозиций."""
+        board.push(move)
+        try:
+            entry = self.search.bot.transposition_table.probe(zobrist_hash(board))
+            if entry is not None and entry.move is not None and board.is_legal(entry.move):
+                return entry.move
+            return None
+        finally:
+            board.pop()
+
+    def stop(self):
+        if self.thread is not None and self.thread.is_alive():
+            self.search.stop()
+            self.release.set()
+            self.thread.join()
+        self.thread = None
+
+    def ponderhit(self):
+        """Соперник сделал ожидаемый ход: продолжаем тот же поиск уже с обычным лимитом времени."""
+        if self.thread is None or not self.thread.is_alive():
+            return
+        params = dict(self.go_params)
+        params.pop('ponder', None)
+        controller = self.controller
+        manager = time_manager_for(params, self.search_color)
+        # Наше время пошло с ponderhit: жесткий лимит отсчитывается от него, мягкий решает по итерациям
+        max_time = manager.hard_limit if manager is not None else allocate_time(params, self.search_color)
+        if max_time is not None:
+            controller.max_time = controller.elapsed() + max_time
+            controller.deadline = time.monotonic() + max_time
+        controller.time_manager = manager
+        self.release.set()
+
+    def wait(self):
+        """Дожидается конца текущего поиска (для команд, которые нельзя выполнять во время поиска)."""
+        if self.thread is not None:
+            if self.go_params.get('ponder') or self.go_params.get('infinite'):
+                self.stop()
+            else:
+                self.thread.join()
+                self.thread = None
+
+    def loop(self, input_stream=None):
+        input_stream = input_stream or sys.stdin
+        for line in input_stream:
+            if not self.handle(line.strip()):
+                break
+        else:
+            self.stop()
+            if self.search is not None:
+                self.search.close()
+
+
+if __name__ == "__main__":
+    UCIEngine().loop()
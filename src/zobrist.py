@@ -0,0 +1,89 @@
+import chess
+import chess.polyglot
+
+# Используем массив случайных чисел Polyglot, чтобы ключи совпадали с chess.polyglot.zobrist_hash
+RANDOM_ARRAY = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+
+CASTLING_KEYS = (
+    (chess.BB_H1, RANDOM_ARRAY[768]),
+    (chess.BB_A1, RANDOM_ARRAY[769]),
+    (chess.BB_H8, RANDOM_ARRAY[770]),
+    (chess.BB_A8, RANDOM_ARRAY[771]),
+)
+TURN_KEY = RANDOM_ARRAY[780]
+
+
+def piece_key(piece_type, color, square):
+    """Ключ фигуры на поле в нумерации Polyglot."""
+    return RANDOM_ARRAY[64 * ((piece_type - 1) * 2 + int(color)) + square]
+
+
+def _state_key(board):
+    """Часть ключа, зависящая от прав на рокировку, взятия на проходе и очереди хода."""
+    key = 0
+    castling = board.clean_castling_rights()
+    for mask, value in CASTLING_KEYS:
+        if castling & mask:
+            key ^= value
+
+    if board.ep_square is not None:
+        # Как и в Polyglot, учитываем поле взятия на проходе, только если рядом есть пешка
+        if board.turn == chess.WHITE:
+            ep_mask = chess.shift_down(chess.BB_SQUARES[board.ep_square])
+        else:
+            ep_mask = chess.shift_up(chess.BB_SQUARES[board.ep_square])
+        ep_mask = chess.shift_left(ep_mask) | chess.shift_right(ep_mask)
+        if ep_mask & board.pawns & board.occupied_co[board.turn]:
+            key ^= RANDOM_ARRAY[772 + chess.square_file(board.ep_square)]
+
+    if board.turn == chess.WHITE:
+        key ^= TURN_KEY
+    return key
+
+
+def zobrist_hash(board):
+    """Полный пересчёт ключа позиции."""
+    return chess.polyglot.zobrist_hash(board)
+
+
+def push_with_key(board, move, key):
+    """Делает ход на доске и возвращает новый ключ, обновлённый инкрементально."""
+    key ^= _state_key(board)
+
+    from_square = move.from_square
+    to_square = move.to_square
+    color = board.turn
+
+    if not move:
+        # Нулевой ход: меняется только очередь хода
+        board.push(move)
+        return key ^ _state_key(board)
+
+    piece_type = board.piece_type_at(from_square)
+
+    key ^= piece_key(piece_type, color, from_square)
+
+    if board.is_castling(move):
+        # В python-chess рокировка кодируется как ход короля на поле ладьи
+        rook_square = to_square if board.color_at(to_square) == color else None
+        if rook_square is None:
+            rook_square = chess.H1 if to_square > from_square else chess.A1
+            rook_square = chess.square(chess.square_file(rook_square), chess.square_rank(from_square))
+        kingside = chess.square_file(rook_square) > chess.square_file(from_square)
+        rank = chess.square_rank(from_square)
+        king_to = chess.square(6 if kingside else 2, rank)
+        rook_to = chess.square(5 if kingside else 3, rank)
+        key ^= piece_key(chess.ROOK, color, rook_square)
+        key ^= piece_key(chess.ROOK, color, rook_to)
+        key ^= piece_key(chess.KING, color, king_to)
+    else:
+        captured_type = board.piece_type_at(to_square)
+        if captured_type is not None:
+            key ^= piece_key(captured_type, not color, to_square)
+        elif piece_type == chess.PAWN and to_square == board.ep_square:
+            captured_square = to_square - 8 if color == chess.WHITE else to_square + 8
+            key ^= piece_key(chess.PAWN, not color, captured_square)
+        key ^= piece_key(move.promotion or piece_type, color, to_square)
+
+    board.push(move)
+    return key ^ _state_key(board)